@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The pipeline modules (processor, cog_loader, cogs, ...) sit next to this package;
+# make them importable once here instead of in every module that needs them
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _BACKEND_DIR not in sys.path:
+    sys.path.append(_BACKEND_DIR)
@@ -1,89 +1,182 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from functools import lru_cache
 from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple
 from mutagen.flac import FLAC
+import hashlib
+import os
+import stat
+import tempfile
+
+from app.core.config import get_settings
+from app.core.http_cache import etag_matches
+from app.core.paths import is_safe_path
 
 router = APIRouter(prefix="/analyze", tags=["analysis"])
 
+# Read size when streaming a cached cover image
+_COVER_CHUNK_SIZE = 64 * 1024
+
 def validate_file_path(file_path: str) -> bool:
-    if not file_path or len(file_path) > 4096:
-        return False
-    if '..' in file_path:
-        return False
-    return True
+    return is_safe_path(file_path)
 
-@router.get("/file")
-async def analyze_file(file_path: str):
+def valid_file_path(file_path: str) -> str:
     if not validate_file_path(file_path):
         raise HTTPException(status_code=400, detail="Invalid file path")
+    return file_path
+
+@lru_cache(maxsize=4096)
+def _analyze_cached(file_path: str, mtime_ns: int, size: int) -> dict:
+    # mtime and size are part of the key so a changed file is parsed again
+    audio = FLAC(file_path)
     
-    path = Path(file_path)
+    metadata = {key.lower(): value[0] if len(value) == 1 else value for key, value in audio.items()}
     
-    if not path.exists():
+    metadata['has_cover_art'] = len(audio.pictures) > 0
+    
+    return metadata
+
+@router.get("/file")
+def analyze_file(file_path: str = Depends(valid_file_path)):
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found")
     
-    if not path.is_file():
+    if not stat.S_ISREG(st.st_mode):
         raise HTTPException(status_code=400, detail="Path is not a file")
     
-    audio = FLAC(str(path))
-    
-    metadata = {}
-    for key, value in audio.items():
-        metadata[key.lower()] = value[0] if len(value) == 1 else value
+    return dict(_analyze_cached(str(Path(file_path)), st.st_mtime_ns, st.st_size))
+
+@lru_cache(maxsize=1)
+def _cover_cache_dir() -> Path:
+    cache_dir = get_settings().get_app_dir() / 'cover_cache'
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+@lru_cache(maxsize=4096)
+def _cover_file(file_path: str, digest: str) -> Optional[Tuple[str, str]]:
+    # Extract the picture once per file version (digest covers path, mtime and size)
+    return _extract_cover(file_path, digest)
+
+def _extract_cover(file_path: str, digest: str) -> Optional[Tuple[str, str]]:
+    audio = FLAC(file_path)
     
-    metadata['has_cover_art'] = len(audio.pictures) > 0
+    if not audio.pictures:
+        return None
     
-    return metadata
+    picture = audio.pictures[0]
+    ext = ''.join(c for c in picture.mime.split('/')[-1] if c.isalnum()) or 'bin'
+    # One image per source file: the name starts with a hash of the path, so older versions can be found and removed
+    path_key = hashlib.blake2b(file_path.encode(), digest_size=16).hexdigest()
+    cache_dir = _cover_cache_dir()
+    cache_path = cache_dir / f"{path_key}-{digest}.{ext}"
+    
+    if not cache_path.exists():
+        # Write to a temporary file first so concurrent requests never serve a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(picture.data)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        
+        for stale in cache_dir.glob(f"{path_key}-*"):
+            if stale != cache_path:
+                stale.unlink(missing_ok=True)
+    
+    return str(cache_path), picture.mime
 
 @router.get("/cover")
-async def get_cover_art(file_path: str):
-    if not validate_file_path(file_path):
-        raise HTTPException(status_code=400, detail="Invalid file path")
-    
-    path = Path(file_path)
-    
-    if not path.exists():
+def get_cover_art(request: Request, file_path: str = Depends(valid_file_path)):
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found")
     
-    audio = FLAC(str(path))
+    # The validator comes from the file's stat alone, so a revalidation never parses the FLAC
+    digest = hashlib.blake2b(
+        f"{file_path}:{st.st_mtime_ns}:{st.st_size}".encode(), digest_size=16
+    ).hexdigest()
+    etag = f'"{digest}"'
     
-    if not audio.pictures:
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "max-age=3600"})
+    
+    cover = _open_cover(str(Path(file_path)), digest)
+    if not cover:
         raise HTTPException(status_code=404, detail="No cover art found")
     
-    picture = audio.pictures[0]
+    image, mime = cover
     
-    return Response(
-        content=picture.data,
-        media_type=picture.mime,
+    # Streamed from the handle opened above, so a newer version replacing the cached file can't cut it short
+    return StreamingResponse(
+        _iter_image(image),
+        media_type=mime,
         headers={
-            "Content-Disposition": f"inline; filename=cover.{picture.mime.split('/')[-1]}",
-            "Cache-Control": "max-age=3600"
+            "Content-Disposition": f"inline; filename=cover.{mime.split('/')[-1]}",
+            "Content-Length": str(os.fstat(image.fileno()).st_size),
+            "Cache-Control": "max-age=3600",
+            "ETag": etag
         }
     )
 
+def _open_cover(file_path: str, digest: str) -> Optional[Tuple[BinaryIO, str]]:
+    cover = _cover_file(file_path, digest)
+    for _ in range(3):
+        if not cover:
+            return None
+        
+        cache_path, mime = cover
+        try:
+            return open(cache_path, 'rb'), mime
+        except FileNotFoundError:
+            # A request for another version of this file removed the image; extract this one again
+            cover = _extract_cover(file_path, digest)
+    
+    raise HTTPException(status_code=503, detail="Cover art is being updated, try again")
+
+def _iter_image(image: BinaryIO) -> Iterator[bytes]:
+    with image:
+        while True:
+            chunk = image.read(_COVER_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
 @router.post("/metadata")
-async def update_metadata(file_path: str, metadata: dict):
-    if not validate_file_path(file_path):
-        raise HTTPException(status_code=400, detail="Invalid file path")
-    
-    path = Path(file_path)
-    
-    if not path.exists():
+def update_metadata(metadata: dict, file_path: str = Depends(valid_file_path)):
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found")
     
+    if not stat.S_ISREG(st.st_mode):
+        raise HTTPException(status_code=400, detail="Path is not a file")
+    
+    path = Path(file_path)
     audio = FLAC(str(path))
     
     had_cover_art = len(audio.pictures) > 0
     
-    audio.clear()
-    
-    for key, value in metadata.items():
-        if key == 'has_cover_art':
-            continue
-        if value is not None and value != "":
-            audio[key] = str(value)
-    
-    audio.save()
+    pairs = [
+        (key, str(value)) for key, value in metadata.items()
+        if key != 'has_cover_art' and value is not None and value != ""
+    ]
+    
+    if audio.tags is None:
+        audio.add_tags()
+    
+    # Vorbis comment keys are case-insensitive; skip the rewrite when nothing would change
+    current = sorted((key.lower(), value) for key, value in audio.tags)
+    if current != sorted((key.lower(), value) for key, value in pairs):
+        audio.tags.clear()
+        audio.tags.extend(pairs)
+        audio.save()
+        _analyze_cached.cache_clear()
     
     return {
         "success": True,
@@ -1,22 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends, Body
-import sys
-from pathlib import Path
-import json
+from fastapi import APIRouter, HTTPException, Depends, Body, Request
+import orjson
 import re
 from typing import Dict, Any
 
-sys.path.append(str(Path(__file__).parent.parent.parent.parent.parent))
-from cog_loader import CogRegistry
+from cog_loader import CogRegistry, get_cog_registry
 from app.schemas.responses import CogInfo, CogSettingInfo
 from app.core.config import get_settings, Settings
+from app.core.http_cache import etag_json_response
 
 router = APIRouter(prefix="/cogs", tags=["cogs"])
 
+_COG_NAME_STRIP = re.compile(r'[^\w]')
+
 @router.get("/list", response_model=list[CogInfo])
-async def list_cogs():
-    cog_registry = CogRegistry()
+async def list_cogs(
+    request: Request,
+    cog_registry: CogRegistry = Depends(get_cog_registry),
+    settings: Settings = Depends(get_settings)
+):
     all_cogs = cog_registry.get_all_cogs()
-    settings = get_settings()
     
     cog_info_list = []
     for name, cog in all_cogs.items():
@@ -46,12 +48,17 @@ async def list_cogs():
             description=doc,
             settings=settings_info # Include settings in the response
         )
-        cog_info_list.append(cog_info)
+        cog_info_list.append(cog_info.model_dump())
     
-    return cog_info_list
+    return etag_json_response(request, cog_info_list)
 
 @router.post("/pipeline")
-async def build_pipeline(required_outputs: list[str], include_cogs: list[str] = None, exclude_cogs: list[str] = None):
+async def build_pipeline(
+    required_outputs: list[str],
+    include_cogs: list[str] = None,
+    exclude_cogs: list[str] = None,
+    cog_registry: CogRegistry = Depends(get_cog_registry)
+):
     if len(required_outputs) > 50:
         raise HTTPException(status_code=400, detail="Too many required outputs")
     
@@ -61,7 +68,6 @@ async def build_pipeline(required_outputs: list[str], include_cogs: list[str] =
     if exclude_cogs and len(exclude_cogs) > 50:
         raise HTTPException(status_code=400, detail="Too many cogs to exclude")
     
-    cog_registry = CogRegistry()
     pipeline_names = cog_registry.build_pipeline_for_outputs(
         required_outputs,
         include_cogs=include_cogs,
@@ -75,13 +81,14 @@ def sanitize_cog_name(name: str) -> str:
     if not isinstance(name, str):
         return ""
     # Allow alphanumeric characters, removing potential path traversal or invalid chars
-    return "".join(re.findall(r'[\w]', name))
+    return _COG_NAME_STRIP.sub('', name)
 
 @router.post("/{cog_name}/settings")
-async def save_cog_settings(
+def save_cog_settings(
     cog_name: str,
     settings_data: Dict[str, Any] = Body(...),
-    settings: Settings = Depends(get_settings)
+    settings: Settings = Depends(get_settings),
+    cog_registry: CogRegistry = Depends(get_cog_registry)
 ):
     """Saves settings for a specific cog to a JSON file."""
     sanitized_name = sanitize_cog_name(cog_name)
@@ -89,7 +96,6 @@ async def save_cog_settings(
         raise HTTPException(status_code=400, detail="Invalid cog name provided.")
 
     # Validate that the cog actually exists
-    cog_registry = CogRegistry()
     if cog_name not in cog_registry.get_all_cogs():
         raise HTTPException(status_code=404, detail=f"Cog '{cog_name}' not found.")
 
@@ -97,8 +103,7 @@ async def save_cog_settings(
     settings_file = settings_dir / f"{sanitized_name}.json"
 
     try:
-        with open(settings_file, 'w', encoding='utf-8') as f:
-            json.dump(settings_data, f, indent=4)
+        settings_file.write_bytes(orjson.dumps(settings_data, option=orjson.OPT_INDENT_2))
         return {"status": "success", "message": f"Settings for '{cog_name}' saved successfully."}
     except Exception as e:
         # Log the exception
@@ -106,9 +111,10 @@ async def save_cog_settings(
 
 
 @router.get("/{cog_name}/settings", response_model=Dict[str, Any])
-async def get_cog_settings(
+def get_cog_settings(
     cog_name: str,
-    settings: Settings = Depends(get_settings)
+    settings: Settings = Depends(get_settings),
+    cog_registry: CogRegistry = Depends(get_cog_registry)
 ):
     """Retrieves settings for a specific cog from its JSON file."""
     sanitized_name = sanitize_cog_name(cog_name)
@@ -116,21 +122,18 @@ async def get_cog_settings(
         raise HTTPException(status_code=400, detail="Invalid cog name provided.")
 
     # Validate that the cog actually exists
-    cog_registry = CogRegistry()
     if cog_name not in cog_registry.get_all_cogs():
         raise HTTPException(status_code=404, detail=f"Cog '{cog_name}' not found.")
 
     settings_dir = settings.get_cog_settings_dir()
     settings_file = settings_dir / f"{sanitized_name}.json"
 
-    if not settings_file.exists():
+    try:
+        return orjson.loads(settings_file.read_bytes())
+    except FileNotFoundError:
         # It's not an error if settings don't exist yet, just return empty
         return {}
-
-    try:
-        with open(settings_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Error decoding settings file.")
     except Exception as e:
         # Log the exception
@@ -1,5 +1,10 @@
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form
+from fastapi.responses import ORJSONResponse
+from functools import lru_cache
 from pathlib import Path
+import asyncio
+import os
+import stat
 import tempfile
 import shutil
 from typing import Optional
@@ -8,10 +13,49 @@ from app.core.dependencies import get_processor_service
 from app.services.processor_service import ProcessorService
 from app.schemas.requests import ProcessDirectoryRequest
 from app.schemas.responses import JobStatusResponse
-from app.core.config import get_settings
+from app.core.config import get_settings, Settings
 
 router = APIRouter(prefix="/process", tags=["processing"])
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+@lru_cache(maxsize=1)
+def get_upload_dir() -> Path:
+    # Created on the first upload; later uploads in a burst skip the lookup and mkdir
+    upload_dir = Path(tempfile.gettempdir()) / "tinfoil" / "uploads"
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    return upload_dir
+
+def save_upload(upload: UploadFile, destination: Path) -> None:
+    source = upload.file
+    source.seek(0)
+    
+    with open(destination, "wb") as buffer:
+        # Small uploads are still held in memory by the spooled file; write them in one go
+        if not getattr(source, '_rolled', True):
+            buffer.write(source.read())
+            return
+        
+        # Larger ones are already on disk; let the kernel copy them. copy_file_range
+        # keeps file-to-file copies in the filesystem (and can share extents), so prefer it
+        try:
+            in_fd, out_fd = source.fileno(), buffer.fileno()
+            if hasattr(os, 'copy_file_range'):
+                while os.copy_file_range(in_fd, out_fd, 1 << 30):
+                    pass
+            else:
+                offset = 0
+                while True:
+                    sent = os.sendfile(out_fd, in_fd, offset, 1 << 30)
+                    if sent == 0:
+                        break
+                    offset += sent
+        except (AttributeError, OSError):
+            source.seek(0)
+            buffer.seek(0)
+            buffer.truncate()
+            shutil.copyfileobj(source, buffer, length=UPLOAD_CHUNK_SIZE)
+
 @router.post("/file", response_model=JobStatusResponse)
 async def process_file(
     background_tasks: BackgroundTasks,
@@ -19,10 +63,9 @@ async def process_file(
     force_update: bool = Form(False),
     output_pattern: Optional[str] = Form(None),
     selected_cogs: Optional[str] = Form(None),
-    processor_service: ProcessorService = Depends(get_processor_service)
+    processor_service: ProcessorService = Depends(get_processor_service),
+    settings: Settings = Depends(get_settings)
 ):
-    settings = get_settings()
-    
     if not file.filename:
         raise HTTPException(status_code=400, detail="No filename provided")
     
@@ -32,20 +75,19 @@ async def process_file(
     if len(file.filename) > 255:
         raise HTTPException(status_code=400, detail="Filename too long")
     
+    if file.size is not None and file.size > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail="File too large")
+    
     cog_list = None
     if selected_cogs:
         cog_list = [cog.strip() for cog in selected_cogs.split(",") if cog.strip()]
         if len(cog_list) > 50:
             raise HTTPException(status_code=400, detail="Too many cogs selected")
     
-    temp_dir = Path(tempfile.gettempdir()) / "tinfoil" / "uploads"
-    if not temp_dir.exists():
-        temp_dir.mkdir(parents=True, exist_ok=True)
-    
-    file_path = temp_dir / file.filename
+    file_path = get_upload_dir() / file.filename
     
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Keep the event loop free while the upload is written to disk
+    await asyncio.to_thread(save_upload, file, file_path)
     
     output_dir = settings.get_default_output_dir()
     
@@ -73,16 +115,7 @@ async def process_file(
     if not job:
         raise HTTPException(status_code=500, detail="Failed to create job")
     
-    return JobStatusResponse(
-        job_id=job.id,
-        status=job.status,
-        progress=job.progress,
-        result=job.result,
-        error=job.error,
-        file_progress=job.file_progress,
-        created_at=job.created_at,
-        updated_at=job.updated_at
-    )
+    return JobStatusResponse(**job.snapshot())
 
 @router.post("/directory", response_model=JobStatusResponse)
 async def process_directory(
@@ -93,10 +126,12 @@ async def process_directory(
     input_dir = Path(request.input_path)
     output_dir = Path(request.output_path)
     
-    if not input_dir.exists():
+    try:
+        input_mode = os.stat(input_dir).st_mode
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Input directory not found")
     
-    if not input_dir.is_dir():
+    if not stat.S_ISDIR(input_mode):
         raise HTTPException(status_code=400, detail="Input path is not a directory")
     
     options = {
@@ -124,16 +159,7 @@ async def process_directory(
     if not job:
         raise HTTPException(status_code=500, detail="Failed to create job")
     
-    return JobStatusResponse(
-        job_id=job.id,
-        status=job.status,
-        progress=job.progress,
-        result=job.result,
-        error=job.error,
-        file_progress=job.file_progress,
-        created_at=job.created_at,
-        updated_at=job.updated_at
-    )
+    return JobStatusResponse(**job.snapshot())
 
 @router.get("/status/{job_id}", response_model=JobStatusResponse)
 async def get_job_status(
@@ -148,13 +174,5 @@ async def get_job_status(
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return JobStatusResponse(
-        job_id=job.id,
-        status=job.status,
-        progress=job.progress,
-        result=job.result,
-        error=job.error,
-        file_progress=job.file_progress,
-        created_at=job.created_at,
-        updated_at=job.updated_at
-    )
\ No newline at end of file
+    # The snapshot already has the JobStatusResponse shape; skip validating every file entry on each poll
+    return ORJSONResponse(content=job.snapshot())
\ No newline at end of file
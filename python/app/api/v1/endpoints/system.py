@@ -1,21 +1,33 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pathlib import Path
+from typing import Iterator
+import orjson
 import os
 
-from app.core.config import get_settings
+from audio_files import walk_audio_files
+from app.core.config import get_settings, Settings
+from app.core.http_cache import etag_json_response
+from app.core.paths import is_safe_path
 from app.schemas.responses import SystemInfo, HealthCheck
 from app.core.dependencies import get_processor_service
 from app.services.processor_service import ProcessorService
 
 router = APIRouter(prefix="/system", tags=["system"])
 
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+def human_readable_size(size: int, decimal_places: int = 1) -> str:
+    if size < 1024:
+        return f"{size} B"
+    idx = min(len(_SIZE_UNITS) - 1, (size.bit_length() - 1) // 10)
+    return f"{size / (1 << (idx * 10)):.{decimal_places}f} {_SIZE_UNITS[idx]}"
+
 @router.get("/info", response_model=SystemInfo)
-async def get_system_info():
-    settings = get_settings()
-    
+async def get_system_info(request: Request, settings: Settings = Depends(get_settings)):
     fpcalc_path = settings.get_fpcalc_path()
     
-    return SystemInfo(
+    info = SystemInfo(
         fpcalc_installed=fpcalc_path is not None,
         fpcalc_path=fpcalc_path,
         app_dir=str(settings.get_app_dir()),
@@ -24,22 +36,24 @@ async def get_system_info():
         system=os.name,
         version=settings.VERSION
     )
+    
+    return etag_json_response(request, info.model_dump())
 
 @router.get("/health", response_model=HealthCheck)
-async def health_check():
-    settings = get_settings()
+async def health_check(settings: Settings = Depends(get_settings)):
     fpcalc_path = settings.get_fpcalc_path()
     
     return HealthCheck(
         status="healthy",
         version=settings.VERSION,
-        fpcalc_available=fpcalc_path is not None and Path(fpcalc_path).exists()
+        fpcalc_available=fpcalc_path is not None
     )
 
 @router.get("/validate")
-async def validate_setup(processor_service: ProcessorService = Depends(get_processor_service)):
-    settings = get_settings()
-    
+async def validate_setup(
+    processor_service: ProcessorService = Depends(get_processor_service),
+    settings: Settings = Depends(get_settings)
+):
     validations = {
         "api_key": len(settings.ACOUSTID_API_KEY) > 0,
         "fpcalc": settings.get_fpcalc_path() is not None
@@ -50,41 +64,50 @@ async def validate_setup(processor_service: ProcessorService = Depends(get_proce
         "validations": validations
     }
 
+def _audio_file_entries(dir_str: str, supported_formats: frozenset[str]) -> Iterator[dict]:
+    # Every walked path starts with this prefix, so relative paths are a slice
+    prefix_len = len(os.path.join(dir_str, ''))
+    
+    for entry in walk_audio_files(dir_str, supported_formats):
+        size = entry.stat().st_size
+        
+        yield {
+            "name": entry.name,
+            "path": entry.path,
+            "relative_path": entry.path[prefix_len:],
+            "size": size,
+            "size_human": human_readable_size(size)
+        }
+
+def _ndjson_lines(directory: str, entries: Iterator[dict]) -> Iterator[bytes]:
+    file_count = 0
+    for entry in entries:
+        file_count += 1
+        yield orjson.dumps(entry) + b"\n"
+    # The summary goes last, once the walk knows how many files it found
+    yield orjson.dumps({"directory": directory, "file_count": file_count}) + b"\n"
+
 @router.get("/files")
-async def list_files(directory: str):
-    if '..' in directory or len(directory) > 4096:
+def list_files(directory: str, request: Request, settings: Settings = Depends(get_settings)):
+    if not is_safe_path(directory):
         return {"error": "Invalid directory path"}
     
-    dir_path = Path(directory)
+    dir_str = str(Path(directory))
     
-    if not dir_path.exists() or not dir_path.is_dir():
+    if not os.path.isdir(dir_str):
         return {"error": "Directory not found"}
     
-    settings = get_settings()
-    audio_files = []
+    entries = _audio_file_entries(dir_str, settings.SUPPORTED_AUDIO_FORMATS)
     
-    for file_path in dir_path.rglob('*'):
-        if file_path.is_file() and file_path.suffix.lower() in settings.SUPPORTED_AUDIO_FORMATS:
-            rel_path = file_path.relative_to(dir_path)
-            size = file_path.stat().st_size
-            
-            if size < 1024:
-                size_str = f"{size} B"
-            elif size < 1024 * 1024:
-                size_str = f"{size / 1024:.1f} KB"
-            else:
-                size_str = f"{size / (1024 * 1024):.1f} MB"
-            
-            audio_files.append({
-                "name": file_path.name,
-                "path": str(file_path),
-                "relative_path": str(rel_path),
-                "size": size,
-                "size_human": size_str
-            })
+    if "application/x-ndjson" in request.headers.get("accept", ""):
+        # One line per file as the walk finds it, so large libraries never sit in memory
+        return StreamingResponse(_ndjson_lines(directory, entries), media_type="application/x-ndjson")
     
-    return {
+    audio_files = list(entries)
+    
+    # Already plain JSON types; returning the response directly skips jsonable_encoder's walk over every file
+    return ORJSONResponse(content={
         "directory": directory,
         "file_count": len(audio_files),
         "files": audio_files
-    }
\ No newline at end of file
+    })
\ No newline at end of file
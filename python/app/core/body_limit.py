@@ -0,0 +1,61 @@
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Room for the multipart boundaries and the small form fields sent next to an upload
+MULTIPART_OVERHEAD = 1024 * 1024
+
+class BodyTooLarge(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=413, detail="File too large")
+
+class BodySizeLimitMiddleware:
+    # FastAPI parses (and spools) a multipart body before the endpoint or its dependencies run,
+    # so the limit has to be enforced here, while the body is still being received
+    def __init__(self, app: ASGIApp, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # A declared length over the limit is rejected before any of the body is read
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_body_size:
+                    await self._reject(scope, receive, send)
+                    return
+                break
+        
+        # Chunked bodies carry no length; count them as they arrive
+        received = 0
+        response_started = False
+        
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise BodyTooLarge()
+            return message
+        
+        async def tracking_send(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except BodyTooLarge:
+            # Normally the app's exception handling already answered with a 413
+            if response_started:
+                raise
+            await self._reject(scope, receive, send)
+    
+    async def _reject(self, scope: Scope, receive: Receive, send: Send):
+        response = ORJSONResponse(status_code=413, content={"detail": "File too large"})
+        await response(scope, receive, send)
\ No newline at end of file
@@ -1,7 +1,12 @@
-from pydantic_settings import BaseSettings
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
 from functools import lru_cache
 import os
+import time
+
+# How long a failed fpcalc lookup is trusted before the candidate paths are checked again
+FPCALC_MISS_TTL = 5.0
 
 class Settings(BaseSettings):
     APP_NAME: str = "Tinfoil"
@@ -22,15 +27,33 @@ class Settings(BaseSettings):
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     
     DEFAULT_OUTPUT_PATTERN: str = "{artist}/{year} - {album}/{track:02d} - {title}"
-    SUPPORTED_AUDIO_FORMATS: list[str] = [".flac"]
+    SUPPORTED_AUDIO_FORMATS: frozenset[str] = frozenset({".flac"})
     MAX_FILENAME_LENGTH: int = 250
     MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024
+    # Threads per stage of the processing pipeline (and for concurrent single-file jobs)
+    PROCESSOR_WORKERS: int = 4
+    
+    # Resolved once per (cached) Settings instance; underscore attributes are private, not settings
+    _app_dir: Path | None = None
+    _log_dir: Path | None = None
+    _cog_settings_dir: Path | None = None
+    _default_output_dir: Path | None = None
+    _fpcalc_path: str | None = None
+    _fpcalc_missed_at: float | None = None
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    @field_validator("SUPPORTED_AUDIO_FORMATS")
+    @classmethod
+    def normalize_audio_formats(cls, value: frozenset[str]) -> frozenset[str]:
+        # Membership is tested against lowercased suffixes
+        return frozenset(fmt.lower() for fmt in value)
+    
+    # Read once by get_settings and shared; frozen so no request can change it under the others
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, frozen=True)
     
     def get_app_dir(self) -> Path:
+        if self._app_dir is not None:
+            return self._app_dir
+        
         if os.name == 'nt':
             base_dir = os.path.join(os.environ.get('APPDATA', ''), 'Tinfoil')
         else:
@@ -40,23 +63,40 @@ class Settings(BaseSettings):
             )
         
         path = Path(base_dir)
-        if not path.exists():
-            path.mkdir(parents=True, exist_ok=True)
+        path.mkdir(parents=True, exist_ok=True)
+        self._app_dir = path
         return path
     
     def get_log_dir(self) -> Path:
-        log_dir = self.get_app_dir() / 'logs'
-        if not log_dir.exists():
+        if self._log_dir is None:
+            log_dir = self.get_app_dir() / 'logs'
             log_dir.mkdir(exist_ok=True)
-        return log_dir
+            self._log_dir = log_dir
+        return self._log_dir
     
     def get_cog_settings_dir(self) -> Path:
-        settings_dir = self.get_app_dir() / 'cog_settings'
-        if not settings_dir.exists():
+        if self._cog_settings_dir is None:
+            settings_dir = self.get_app_dir() / 'cog_settings'
             settings_dir.mkdir(parents=True, exist_ok=True)
-        return settings_dir
+            self._cog_settings_dir = settings_dir
+        return self._cog_settings_dir
     
     def get_fpcalc_path(self) -> str | None:
+        # A found path is reused while it still exists; a miss is kept only briefly,
+        # so installing, moving or removing fpcalc later is still picked up
+        if self._fpcalc_path is not None and not os.path.isfile(self._fpcalc_path):
+            self._fpcalc_path = None
+        
+        if self._fpcalc_path is None:
+            now = time.monotonic()
+            if self._fpcalc_missed_at is not None and now - self._fpcalc_missed_at < FPCALC_MISS_TTL:
+                return None
+            
+            self._fpcalc_path = self._find_fpcalc_path()
+            self._fpcalc_missed_at = None if self._fpcalc_path else now
+        return self._fpcalc_path
+    
+    def _find_fpcalc_path(self) -> str | None:
         if self.FPCALC_PATH and os.path.isfile(self.FPCALC_PATH):
             return self.FPCALC_PATH
         
@@ -79,14 +119,17 @@ class Settings(BaseSettings):
         return None
     
     def get_default_output_dir(self) -> Path:
+        if self._default_output_dir is not None:
+            return self._default_output_dir
+        
         if os.name == 'nt':
             base_dir = os.path.join(os.environ.get('USERPROFILE', ''), 'Music', 'Tinfoil')
         else:
             base_dir = os.path.expanduser('~/Music/Tinfoil')
         
         path = Path(base_dir)
-        if not path.exists():
-            path.mkdir(parents=True, exist_ok=True)
+        path.mkdir(parents=True, exist_ok=True)
+        self._default_output_dir = path
         return path
 
 @lru_cache()
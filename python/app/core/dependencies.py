@@ -3,20 +3,28 @@ from app.core.config import get_settings, Settings
 from app.services.job_service import JobService
 from app.services.processor_service import ProcessorService
 import logging
+import threading
 
 _job_service = None
 _processor_service = None
+# Sync dependencies run on the threadpool, so two first requests can race to build the services
+_services_lock = threading.Lock()
 
 def get_job_service() -> JobService:
     global _job_service
     if _job_service is None:
-        _job_service = JobService()
+        with _services_lock:
+            if _job_service is None:
+                _job_service = JobService()
     return _job_service
 
 def get_processor_service() -> ProcessorService:
     global _processor_service
     if _processor_service is None:
-        settings = get_settings()
-        logger = logging.getLogger("processor_service")
-        _processor_service = ProcessorService(settings, logger, get_job_service())
+        job_service = get_job_service()
+        with _services_lock:
+            if _processor_service is None:
+                settings = get_settings()
+                logger = logging.getLogger("processor_service")
+                _processor_service = ProcessorService(settings, logger, job_service)
     return _processor_service
\ No newline at end of file
@@ -0,0 +1,20 @@
+from fastapi import Request
+from fastapi.responses import Response
+import hashlib
+import orjson
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in tags or "*" in tags
+
+def etag_json_response(request: Request, content) -> Response:
+    # Tag the encoded body itself so a poll whose payload did not change gets an empty 304
+    body = orjson.dumps(content)
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
@@ -0,0 +1,9 @@
+import re
+
+MAX_PATH_LENGTH = 4096
+
+# Empty paths, parent-directory segments and NUL bytes (which os.stat rejects with a ValueError)
+_INVALID_PATH = re.compile(r'^$|\.\.|\x00')
+
+def is_safe_path(path: str) -> bool:
+    return len(path) <= MAX_PATH_LENGTH and not _INVALID_PATH.search(path)
\ No newline at end of file
@@ -1,9 +1,12 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from contextlib import asynccontextmanager
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
+from app.core.body_limit import BodySizeLimitMiddleware, MULTIPART_OVERHEAD
 from app.core.config import get_settings
 from app.core.exceptions import TinfoilException
 from app.api.v1.router import api_router
@@ -18,7 +21,6 @@ def setup_logging():
     console_handler.setFormatter(
         logging.Formatter(settings.LOG_FORMAT)
     )
-    logger.addHandler(console_handler)
     
     log_dir = settings.get_log_dir()
     file_handler = RotatingFileHandler(
@@ -29,16 +31,44 @@ def setup_logging():
     file_handler.setFormatter(
         logging.Formatter(settings.LOG_FORMAT)
     )
-    logger.addHandler(file_handler)
+    
+    # Callers only enqueue records; the listener thread does the console and file writes (and rotation)
+    log_queue = queue.Queue(-1)
+    queue_handler = QueueHandler(log_queue)
+    logger.addHandler(queue_handler)
+    
+    listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    listener.start()
+    
+    return queue_handler, listener
 
-setup_logging()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Logging (and the log directory) is set up when the server starts, not when this module is imported
+    queue_handler, listener = setup_logging()
+    try:
+        yield
+    finally:
+        logging.getLogger().removeHandler(queue_handler)
+        # Stopping the listener writes out everything still queued
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
 
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.APP_NAME,
     description=settings.DESCRIPTION,
     version=settings.VERSION,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
+)
+
+# Added first so it runs inside CORS, and a 413 still carries the CORS headers
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_size=settings.MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD
 )
 
 app.add_middleware(
@@ -52,7 +82,7 @@ app.add_middleware(
 
 @app.exception_handler(TinfoilException)
 async def tinfoil_exception_handler(request: Request, exc: TinfoilException):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=400,
         content={
             "error": exc.__class__.__name__,
@@ -1,15 +1,32 @@
-from datetime import datetime
-from typing import Dict, Any, Optional
-import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, Optional, Tuple
+import secrets
+import threading
+import time
+
+# The job ID is the only handle the status endpoints need, so every ID is fully random and unguessable
+def _next_job_id() -> str:
+    return secrets.token_urlsafe(16)
+
+# Staged file updates are published once this many are pending, or after this many seconds
+FLUSH_EVERY = 8
+FLUSH_INTERVAL = 0.1
 
 class Job:
+    # Many finished jobs stay in memory until cleanup; slots keep each one small
+    __slots__ = (
+        "id", "status", "progress", "result", "error", "file_progress",
+        "input_path", "output_path", "options", "created_at", "_created_ns", "_updated_ns",
+        "_lock", "_pending_files", "_pending_progress", "_last_flush"
+    )
+    
     def __init__(
         self,
         input_path: Optional[str] = None,
         output_path: Optional[str] = None,
         options: Optional[Dict[str, Any]] = None
     ):
-        self.id = str(uuid.uuid4())
+        self.id = _next_job_id()
         self.status = "pending"
         self.progress = 0.0
         self.result = None
@@ -18,30 +35,108 @@ class Job:
         self.input_path = input_path
         self.output_path = output_path
         self.options = options or {}
+        # Updates only record a monotonic clock reading; wall-clock updated_at is derived when read
         self.created_at = datetime.utcnow()
-        self.updated_at = datetime.utcnow()
+        self._created_ns = self._updated_ns = time.monotonic_ns()
+        # Worker threads update the job while status requests read it
+        self._lock = threading.Lock()
+        self._pending_files: Dict[str, Dict[str, Any]] = {}
+        self._pending_progress: Optional[float] = None
+        self._last_flush = time.monotonic()
+    
+    @property
+    def updated_at(self) -> datetime:
+        return self.created_at + timedelta(microseconds=(self._updated_ns - self._created_ns) // 1000)
+    
+    def idle_seconds(self) -> float:
+        return (time.monotonic_ns() - self._updated_ns) / 1e9
     
     def update_progress(self, progress: float, status: str):
-        self.progress = progress
-        self.status = status
-        self.updated_at = datetime.utcnow()
+        with self._lock:
+            self.progress = progress
+            self.status = status
+            self._updated_ns = time.monotonic_ns()
     
     def set_error(self, error: str):
-        self.error = error
-        self.status = "failed"
-        self.progress = 1.0
-        self.updated_at = datetime.utcnow()
+        with self._lock:
+            self._flush_locked()
+            self.error = error
+            self.status = "failed"
+            self.progress = 1.0
+            self._updated_ns = time.monotonic_ns()
     
     def set_result(self, result: Dict[str, Any]):
-        self.result = result
-        self.status = "completed"
-        self.progress = 1.0
-        self.updated_at = datetime.utcnow()
+        with self._lock:
+            self._flush_locked()
+            self.result = result
+            self.status = "completed"
+            self.progress = 1.0
+            self._updated_ns = time.monotonic_ns()
     
     def update_file_progress(self, file_path: str, progress: float, status: str, error: Optional[str] = None):
-        self.file_progress[file_path] = {
-            "progress": progress,
-            "status": status,
-            "error": error
-        }
-        self.updated_at = datetime.utcnow()
\ No newline at end of file
+        with self._lock:
+            self.file_progress[file_path] = {
+                "progress": progress,
+                "status": status,
+                "error": error
+            }
+            self._updated_ns = time.monotonic_ns()
+    
+    def bulk_update_file_progress(self, updates: Iterable[Tuple[str, float, str, Optional[str]]]):
+        # One lock and one timestamp for the whole batch
+        with self._lock:
+            self.file_progress.update(
+                (file_path, {"progress": progress, "status": status, "error": error})
+                for file_path, progress, status, error in updates
+            )
+            self._updated_ns = time.monotonic_ns()
+    
+    def stage_file_progress(
+        self,
+        file_path: str,
+        progress: float,
+        status: str,
+        error: Optional[str] = None,
+        job_progress: Optional[float] = None
+    ):
+        # Buffer the update and publish it together with others, so readers see whole batches
+        with self._lock:
+            self._pending_files[file_path] = {
+                "progress": progress,
+                "status": status,
+                "error": error
+            }
+            if job_progress is not None:
+                self._pending_progress = job_progress
+            
+            if len(self._pending_files) >= FLUSH_EVERY or time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+                self._flush_locked()
+    
+    def _flush_locked(self):
+        if not self._pending_files and self._pending_progress is None:
+            return
+        
+        self.file_progress.update(self._pending_files)
+        self._pending_files.clear()
+        if self._pending_progress is not None:
+            self.progress = self._pending_progress
+            self._pending_progress = None
+        
+        self._updated_ns = time.monotonic_ns()
+        self._last_flush = time.monotonic()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        # A consistent copy of the job's state, safe to serialize outside the lock.
+        # Staged updates are published first, so a reader never sees a result that is older than it should be.
+        with self._lock:
+            self._flush_locked()
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "progress": self.progress,
+                "result": self.result,
+                "error": self.error,
+                "file_progress": dict(self.file_progress),
+                "created_at": self.created_at,
+                "updated_at": self.updated_at
+            }
\ No newline at end of file
@@ -1,28 +1,24 @@
-from pydantic import BaseModel, Field, validator
-from typing import Optional
+from pydantic import BaseModel, Field, StringConstraints, field_validator
+from typing import Annotated, Optional
+
+from app.core.paths import is_safe_path
+
+# Length limits are checked by pydantic-core itself; only the pattern rules need Python validators
+CogName = Annotated[str, StringConstraints(max_length=100)]
+OutputPattern = Annotated[str, StringConstraints(max_length=500)]
 
 class ProcessFileRequest(BaseModel):
     force_update: bool = False
-    output_pattern: Optional[str] = None
-    selected_cogs: Optional[list[str]] = Field(default=None, max_items=50)
+    output_pattern: Optional[OutputPattern] = None
+    selected_cogs: Optional[list[CogName]] = Field(default=None, max_length=50)
     
-    @validator('output_pattern')
-    def validate_output_pattern(cls, v):
+    @field_validator('output_pattern')
+    @classmethod
+    def validate_output_pattern(cls, v: Optional[str]) -> Optional[str]:
         if v is None:
             return v
         if '..' in v or v.startswith('/') or '\\' in v:
             raise ValueError('Invalid output pattern')
-        if len(v) > 500:
-            raise ValueError('Output pattern too long')
-        return v
-    
-    @validator('selected_cogs')
-    def validate_cogs(cls, v):
-        if v is None:
-            return v
-        for cog in v:
-            if not isinstance(cog, str) or len(cog) > 100:
-                raise ValueError('Invalid cog name')
         return v
 
 class ProcessDirectoryRequest(BaseModel):
@@ -31,10 +27,11 @@ class ProcessDirectoryRequest(BaseModel):
     force_update: bool = False
     output_pattern: Optional[str] = None
     tag_fallback: bool = True
-    selected_cogs: Optional[list[str]] = Field(default=None, max_items=50)
+    selected_cogs: Optional[list[CogName]] = Field(default=None, max_length=50)
     
-    @validator('input_path', 'output_path')
-    def validate_paths(cls, v):
-        if '..' in v:
+    @field_validator('input_path', 'output_path')
+    @classmethod
+    def validate_paths(cls, v: str) -> str:
+        if not is_safe_path(v):
             raise ValueError('Path traversal not allowed')
         return v
\ No newline at end of file
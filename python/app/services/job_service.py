@@ -1,50 +1,87 @@
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+from datetime import timedelta
 from app.models.job import Job
 import asyncio
 import logging
+import threading
 
 class JobService:
     def __init__(self):
-        self.jobs: Dict[str, Job] = {}
+        # Ordered by last update (oldest first), so cleanup only has to look at the front
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # Guards adding, reordering and removing jobs; lookups are single dict reads and need no lock
+        self._lock = threading.Lock()
         self.logger = logging.getLogger("job_service")
         self._cleanup_task = None
     
     def create_job(self, **kwargs) -> str:
         job = Job(**kwargs)
-        self.jobs[job.id] = job
+        with self._lock:
+            self.jobs[job.id] = job
         return job.id
     
     def get_job(self, job_id: str) -> Optional[Job]:
         return self.jobs.get(job_id)
     
+    def _touch(self, job_id: str):
+        with self._lock:
+            if job_id in self.jobs:
+                self.jobs.move_to_end(job_id)
+    
     def update_job_progress(self, job_id: str, progress: float, status: str):
         job = self.jobs.get(job_id)
         if job:
             job.update_progress(progress, status)
+            self._touch(job_id)
     
     def set_job_error(self, job_id: str, error: str):
         job = self.jobs.get(job_id)
         if job:
             job.set_error(error)
+            self._touch(job_id)
     
     def set_job_result(self, job_id: str, result: Dict):
         job = self.jobs.get(job_id)
         if job:
             job.set_result(result)
+            self._touch(job_id)
     
     def update_file_progress(self, job_id: str, file_path: str, progress: float, status: str, error: Optional[str] = None):
         job = self.jobs.get(job_id)
         if job:
             job.update_file_progress(file_path, progress, status, error)
+            self._touch(job_id)
+    
+    def bulk_update_file_progress(self, job_id: str, updates: Iterable[Tuple[str, float, str, Optional[str]]]):
+        job = self.jobs.get(job_id)
+        if job:
+            job.bulk_update_file_progress(updates)
+            self._touch(job_id)
+    
+    def stage_file_progress(
+        self,
+        job_id: str,
+        file_path: str,
+        progress: float,
+        status: str,
+        error: Optional[str] = None,
+        job_progress: Optional[float] = None
+    ):
+        job = self.jobs.get(job_id)
+        if job:
+            job.stage_file_progress(file_path, progress, status, error, job_progress)
+            self._touch(job_id)
     
     def cleanup_old_jobs(self, max_age: timedelta = timedelta(hours=24)):
-        now = datetime.utcnow()
-        to_remove = [
-            job_id for job_id, job in self.jobs.items()
-            if now - job.updated_at > max_age
-        ]
-        for job_id in to_remove:
-            del self.jobs[job_id]
-        if len(to_remove) > 0:
-            self.logger.info(f"Cleaned up {len(to_remove)} old jobs")
\ No newline at end of file
+        max_idle = max_age.total_seconds()
+        removed = 0
+        with self._lock:
+            while self.jobs:
+                job = next(iter(self.jobs.values()))
+                if job.idle_seconds() <= max_idle:
+                    break
+                self.jobs.popitem(last=False)
+                removed += 1
+        if removed > 0:
+            self.logger.info(f"Cleaned up {removed} old jobs")
\ No newline at end of file
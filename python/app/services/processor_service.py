@@ -1,56 +1,110 @@
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 import logging
-import tempfile
-import shutil
 import asyncio
+import os
+import threading
 from concurrent.futures import ThreadPoolExecutor
 
 from app.core.config import Settings
 from app.core.exceptions import ProcessingError, ValidationError
+from app.core.paths import is_safe_path
 from app.services.job_service import JobService
 
-import sys
-sys.path.append(str(Path(__file__).parent.parent.parent))
+from audio_files import walk_audio_files
 from processor import TinfoilProcessor
-from cog_loader import CogRegistry
+from cog_loader import get_cog_registry
 from base_cog import BaseCog
+from request_cache import RequestCache
 from cogs.tag_based_match_cog import TagBasedMatchCog
 
+# Output patterns come from requests, so bound how many distinct processors are kept
+MAX_CACHED_PROCESSORS = 32
+# Overall directory progress is only republished once it has moved by at least this much
+PROGRESS_STEP = 0.01
+
 class ProcessorService:
     def __init__(self, settings: Settings, logger: logging.Logger, job_service: JobService):
         self.settings = settings
         self.logger = logger
         self.job_service = job_service
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.executor = ThreadPoolExecutor(max_workers=settings.PROCESSOR_WORKERS)
+        self.request_cache = RequestCache(settings.get_app_dir() / 'request_cache.sqlite3', logger)
+        # Built pipelines keyed by the selected cog names, reused across jobs
+        self._pipeline_cache: Dict[Tuple[str, ...], List[BaseCog]] = {}
+        self._pipeline_lock = threading.Lock()
+        # Processors keyed by (selected cogs, output pattern, tag fallback), also guarded by _pipeline_lock
+        self._processor_cache: Dict[Tuple[Tuple[str, ...], str, bool], TinfoilProcessor] = {}
     
     def _validate_file_path(self, path: str) -> bool:
-        if not path or len(path) > 4096:
-            return False
-        if '..' in path:
-            return False
-        return True
+        return is_safe_path(path)
     
     def _validate_audio_file(self, path: Path) -> bool:
-        if not path.exists():
-            return False
-        if not path.is_file():
+        if not os.path.isfile(path):
             return False
         if path.suffix.lower() not in self.settings.SUPPORTED_AUDIO_FORMATS:
             return False
         return True
     
     def _build_cog_pipeline(self, selected_cogs: Optional[List[str]] = None) -> List[BaseCog]:
-        cog_registry = CogRegistry(logger=self.logger)
-        cog_registry.load_cogs()
+        key = tuple(selected_cogs or ())
+        with self._pipeline_lock:
+            pipeline = self._pipeline_cache.get(key)
+            if pipeline is None:
+                pipeline, complete = self._create_cog_pipeline(selected_cogs)
+                # Don't keep a pipeline missing cogs (e.g. fpcalc not installed yet), so it's retried next time
+                if complete:
+                    self._pipeline_cache[key] = pipeline
+        
+        # Callers may filter the list; the cog instances themselves are shared
+        return list(pipeline)
+    
+    def _get_processor(
+        self,
+        selected_cogs: Optional[List[str]],
+        output_pattern: str,
+        tag_fallback: bool = True
+    ) -> Optional[TinfoilProcessor]:
+        key = (tuple(selected_cogs or ()), output_pattern, tag_fallback)
+        processor = self._processor_cache.get(key)
+        if processor is not None:
+            return processor
+        
+        pipeline = self._build_cog_pipeline(selected_cogs)
+        if not pipeline:
+            return None
+        
+        if not tag_fallback:
+            pipeline = [cog for cog in pipeline if not isinstance(cog, TagBasedMatchCog)]
+            self.logger.info("Tag-based fallback matching is disabled.")
+        
+        processor = TinfoilProcessor(
+            pipeline=pipeline,
+            output_pattern=output_pattern,
+            logger=self.logger,
+            max_workers=self.settings.PROCESSOR_WORKERS,
+            request_cache=self.request_cache
+        )
+        
+        with self._pipeline_lock:
+            # Only complete pipelines are cached, so only their processors are kept too
+            if key[0] in self._pipeline_cache:
+                if len(self._processor_cache) >= MAX_CACHED_PROCESSORS:
+                    self._processor_cache.pop(next(iter(self._processor_cache)))
+                self._processor_cache[key] = processor
+        
+        return processor
+    
+    def _create_cog_pipeline(self, selected_cogs: Optional[List[str]] = None) -> Tuple[List[BaseCog], bool]:
+        cog_registry = get_cog_registry()
 
         pipeline = []
         
         cog_names_to_load = selected_cogs
         if not cog_names_to_load:
             cog_names_to_load = [
-                'AcoustIDCog',
                 'TagBasedMatchCog',
+                'AcoustIDCog',
                 'MusicBrainzCog',
                 'CoverArtCog',
                 'LrclibLyricsCog',
@@ -96,7 +150,7 @@ class ProcessorService:
             except Exception as e:
                 self.logger.error(f"Failed to instantiate cog '{cog_name}': {e}")
         
-        return pipeline
+        return pipeline, len(pipeline) == len(cog_names_to_load)
 
     def create_job(self, input_path: Optional[str] = None, output_path: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> str:
         if input_path and not self._validate_file_path(input_path):
@@ -118,9 +172,10 @@ class ProcessorService:
         
         if not self._validate_audio_file(file_path):
             self.job_service.update_file_progress(job_id, str_path, 1.0, "failed", "Invalid audio file")
+            self.job_service.set_job_error(job_id, "Invalid audio file")
             return False
         
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         success = await loop.run_in_executor(
             self.executor,
             self._process_file_sync,
@@ -139,36 +194,34 @@ class ProcessorService:
         output_pattern = options.get('output_pattern') or self.settings.DEFAULT_OUTPUT_PATTERN
         selected_cogs = options.get('selected_cogs')
         
-        pipeline = self._build_cog_pipeline(selected_cogs)
-        if not pipeline:
+        processor = self._get_processor(selected_cogs, output_pattern)
+        if processor is None:
             self.job_service.update_file_progress(job_id, str_path, 1.0, "failed", "Could not build processing pipeline.")
+            self.job_service.set_job_error(job_id, "Could not build processing pipeline.")
             return False
-
-        processor = TinfoilProcessor(
-            pipeline=pipeline,
-            output_pattern=output_pattern,
-            logger=self.logger
-        )
         
         self.job_service.update_file_progress(job_id, str_path, 0.3, "processing")
         
-        success = processor.process_file(file_path, output_dir, force_update)
+        output_file = processor.process_file_to(file_path, output_dir, force_update)
+        success = output_file is not None
         
         if success:
             self.job_service.update_file_progress(job_id, str_path, 1.0, "completed")
+            self.job_service.set_job_result(job_id, {"output_file": str(output_file)})
         else:
             self.job_service.update_file_progress(job_id, str_path, 1.0, "failed", "Processing failed")
+            self.job_service.set_job_error(job_id, "Processing failed")
         
         return success
     
     async def process_directory(self, job_id: str, input_dir: Path, output_dir: Path, options: Dict[str, Any]):
         self.job_service.update_job_progress(job_id, 0.1, "processing")
         
-        if not input_dir.exists() or not input_dir.is_dir():
+        if not os.path.isdir(input_dir):
             self.job_service.set_job_error(job_id, "Input directory not found")
             return
         
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         await loop.run_in_executor(
             self.executor,
             self._process_directory_sync,
@@ -184,20 +237,10 @@ class ProcessorService:
         selected_cogs = options.get('selected_cogs')
         tag_fallback = options.get('tag_fallback', True)
         
-        pipeline = self._build_cog_pipeline(selected_cogs)
-        if not pipeline:
+        processor = self._get_processor(selected_cogs, output_pattern, tag_fallback)
+        if processor is None:
             self.job_service.set_job_error(job_id, "Could not build processing pipeline.")
             return
-
-        if not tag_fallback:
-            pipeline = [cog for cog in pipeline if not isinstance(cog, TagBasedMatchCog)]
-            self.logger.info("Tag-based fallback matching is disabled.")
-
-        processor = TinfoilProcessor(
-            pipeline=pipeline,
-            output_pattern=output_pattern,
-            logger=self.logger
-        )
         
         self.job_service.update_job_progress(job_id, 0.2, "processing")
         
@@ -208,27 +251,35 @@ class ProcessorService:
             self.job_service.set_job_error(job_id, "No audio files found")
             return
         
-        for file_path in audio_files:
-            str_path = str(file_path)
-            self.job_service.update_file_progress(job_id, str_path, 0.0, "pending")
+        self.job_service.bulk_update_file_progress(
+            job_id, [(str(file_path), 0.0, "pending", None) for file_path in audio_files]
+        )
         
-        processed_count = 0
+        done_count = 0
+        last_reported = 0.0
         
-        for i, file_path in enumerate(audio_files):
+        def on_result(file_path: Path, success: bool):
+            nonlocal done_count, last_reported
             str_path = str(file_path)
             
-            self.job_service.update_file_progress(job_id, str_path, 0.1, "processing")
-            
-            success = processor.process_file(file_path, output_dir, force_update)
+            done_count += 1
+            progress = done_count / total_files
+            job_progress = None
+            if progress - last_reported >= PROGRESS_STEP or done_count == total_files:
+                job_progress = last_reported = progress
             
+            # Staged and published in batches together with the overall progress
             if success:
-                self.job_service.update_file_progress(job_id, str_path, 1.0, "completed")
-                processed_count += 1
+                self.job_service.stage_file_progress(
+                    job_id, str_path, 1.0, "completed", job_progress=job_progress
+                )
             else:
-                self.job_service.update_file_progress(job_id, str_path, 1.0, "failed", "Processing failed")
-            
-            progress = (i + 1) / total_files
-            self.job_service.update_job_progress(job_id, progress, "processing")
+                self.job_service.stage_file_progress(
+                    job_id, str_path, 1.0, "failed", "Processing failed", job_progress=job_progress
+                )
+        
+        # Files run concurrently through the processor's staged pipeline
+        processed_count = len(processor.process_files(audio_files, output_dir, force_update, on_result))
         
         result = {
             "total_files": total_files,
@@ -238,11 +289,8 @@ class ProcessorService:
         
         self.job_service.set_job_result(job_id, result)
     
-    def _get_audio_files(self, directory: Path) -> list:
-        audio_files = []
-        
-        for file_path in directory.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in self.settings.SUPPORTED_AUDIO_FORMATS:
-                audio_files.append(file_path)
-        
-        return audio_files
\ No newline at end of file
+    def _get_audio_files(self, directory: Path) -> List[Path]:
+        return [
+            Path(entry.path)
+            for entry in walk_audio_files(str(directory), self.settings.SUPPORTED_AUDIO_FORMATS)
+        ]
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+@file audio_files.py
+@brief Directory walker shared by the processor, the processing service and the file listing endpoint.
+"""
+import os
+from typing import AbstractSet, Iterator
+
+
+def walk_audio_files(directory: str, supported_formats: AbstractSet[str]) -> Iterator[os.DirEntry]:
+    """Yield every audio file below a directory, recursing into subdirectories.
+    
+    scandir entries carry their type from readdir, so non-matching names cost
+    no stat call and no Path object. Symlinked directories are not followed,
+    and directories that cannot be read are skipped.
+    
+    Args:
+        directory: Directory to walk
+        supported_formats: Lower-case suffixes to match, including the dot (e.g. '.flac')
+    
+    Yields:
+        os.DirEntry: One entry per matching regular file
+    """
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from walk_audio_files(entry.path, supported_formats)
+                    continue
+                
+                name = entry.name
+                dot = name.rfind('.')
+                if dot > 0 and name[dot:].lower() in supported_formats and entry.is_file():
+                    yield entry
+    except PermissionError:
+        return
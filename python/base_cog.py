@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import List, Optional, Dict, Any
 from song import Song
+from http_session import get_http_session
 import logging
 
 class BaseCog(ABC):
@@ -13,6 +14,10 @@ class BaseCog(ABC):
     
     def __init__(self, logger: Optional[logging.Logger] = None):
         self.logger = logger if logger else logging.getLogger(self.__class__.__name__)
+        # Set by the processor when a persistent response cache is available
+        self.request_cache = None
+        self._output_tags_set = frozenset(self.output_tags)
+        self.session = get_http_session()
     
     @abstractmethod
     def process(self, song: Song) -> bool:
@@ -3,11 +3,27 @@ import inspect
 import logging
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Type, Optional
 
 from base_cog import BaseCog
 
+@lru_cache(maxsize=1)
+def _find_cogs_dir() -> Optional[Path]:
+    # The server never changes directory, so resolve the location once per process
+    for candidate in (Path(__file__).parent / 'cogs', Path.cwd() / 'cogs'):
+        if candidate.is_dir():
+            return candidate
+    return None
+
+@lru_cache(maxsize=1)
+def get_cog_registry() -> 'CogRegistry':
+    # Cog classes don't change while the server runs; load them once and share the registry
+    registry = CogRegistry()
+    registry.load_cogs()
+    return registry
+
 class CogRegistry:
     def __init__(self, logger: Optional[logging.Logger] = None):
         self.logger = logger if logger else logging.getLogger(__name__)
@@ -20,20 +36,12 @@ class CogRegistry:
         
         self.logger.info("Loading cogs...")
         
-        current_dir = Path(__file__).parent
-        potential_cogs_dir = current_dir / 'cogs'
-        
-        if potential_cogs_dir.exists() and potential_cogs_dir.is_dir():
-            cogs_dir = potential_cogs_dir
+        cogs_dir = _find_cogs_dir()
+        if cogs_dir:
             self.logger.info(f"Found cogs directory: {cogs_dir}")
         else:
-            cwd_cogs_dir = Path.cwd() / 'cogs'
-            if cwd_cogs_dir.exists() and cwd_cogs_dir.is_dir():
-                cogs_dir = cwd_cogs_dir
-                self.logger.info(f"Found cogs directory: {cogs_dir}")
-            else:
-                self.logger.error("Could not find cogs directory")
-                return
+            self.logger.error("Could not find cogs directory")
+            return
         
         if str(cogs_dir.parent) not in sys.path:
             sys.path.insert(0, str(cogs_dir.parent))
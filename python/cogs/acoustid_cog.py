@@ -1,10 +1,10 @@
 import acoustid
-import requests
 import json
 from typing import Optional, Tuple, Dict, Any
 import logging
 from pathlib import Path
 from base_cog import BaseCog
+from request_cache import Uncached, cached
 from song import Song
 
 class AcoustIDCog(BaseCog):
@@ -26,6 +26,9 @@ class AcoustIDCog(BaseCog):
         }
     ]
     
+    # A tag-based match at least this similar stands in for fingerprinting
+    trusted_match_score = 0.9
+    
     def __init__(self, api_key: str, fpcalc_path: Optional[str] = None, logger: Optional[logging.Logger] = None):
         super().__init__(logger)
         if not api_key:
@@ -40,6 +43,28 @@ class AcoustIDCog(BaseCog):
             acoustid.FPCALC_PATH = fpcalc_path
             self.logger.info(f"Set fpcalc path to: {fpcalc_path}")
     
+    def can_process(self, song: Song) -> bool:
+        if not super().can_process(song):
+            return False
+        
+        # Fingerprinting is the costliest step; skip it when a close tag-based match found the recording
+        # during this run. An ID that was already in the file or a fuzzy match is not trusted, and a forced
+        # update always fingerprints.
+        if (
+            not song.force_update
+            and song.all_metadata.get('musicbrainz_recordingid')
+            and song.is_tag_modified('musicbrainz_recordingid')
+            and song.match_score is not None
+            and song.match_score >= self.trusted_match_score
+        ):
+            self.logger.debug(
+                f"Recording ID matched from tags for {song.filepath} (score {song.match_score:.2f}), "
+                f"skipping fingerprinting"
+            )
+            return False
+        
+        return True
+    
     def process(self, song: Song) -> bool:
         fingerprint, duration = self.get_fingerprint(str(song.filepath))
         if not fingerprint or not duration:
@@ -79,6 +104,7 @@ class AcoustIDCog(BaseCog):
         self.logger.info(f"Generated fingerprint of length {len(fingerprint)} for file '{file_path}'")
         return fingerprint, duration
     
+    @cached('acoustid_lookup')
     def lookup_fingerprint(self, fingerprint: str, duration: float) -> Optional[Dict[str, Any]]:
         params = {
             'client': self.api_key,
@@ -93,7 +119,7 @@ class AcoustIDCog(BaseCog):
         self.logger.info(f"Querying AcoustID API with duration: {duration}")
         self.logger.debug(f"AcoustID params: {params}")
         
-        response = requests.get(
+        response = self.session.get(
             self.acoustid_api_url,
             params=params,
             headers=headers,
@@ -109,8 +135,9 @@ class AcoustIDCog(BaseCog):
         response.raise_for_status()
         
         if data.get('status') != 'ok':
+            # An error (bad key, rate limit) says nothing about the fingerprint; don't remember it
             self.logger.warning(f"AcoustID API returned non-ok status: {data.get('status')}")
-            return None
+            return Uncached(None)
         
         if not data.get('results'):
             self.logger.warning("No results found in AcoustID response")
@@ -144,7 +171,7 @@ class AcoustIDCog(BaseCog):
             'format': 'json'
         }
         
-        response = requests.get(
+        response = self.session.get(
             self.acoustid_api_url,
             params=params,
             timeout=5
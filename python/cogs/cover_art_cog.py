@@ -1,10 +1,10 @@
-import requests
 import logging
 from typing import Optional, Tuple
 from pathlib import Path
 import io
 from PIL import Image
 from base_cog import BaseCog
+from request_cache import Uncached, cached
 from song import Song
 
 class CoverArtCog(BaseCog):
@@ -43,17 +43,23 @@ class CoverArtCog(BaseCog):
             return "image/png"
         return "image/jpeg"
     
+    @cached('coverart_front')
     def get_cover_art_data(self, release_id: str) -> Optional[bytes]:
         url = f"{self.coverart_api_url}/release/{release_id}/front"
         self.logger.debug(f"Fetching cover art from URL: {url}")
         
         headers = {'User-Agent': self.user_agent}
-        response = requests.get(url, headers=headers, timeout=10)
+        response = self.session.get(url, headers=headers, timeout=10)
         
         if response.status_code == 200 and response.content:
             self.logger.info(f"Successfully fetched cover art for release ID '{release_id}'")
             return self._process_image_data(response.content)
         
+        if response.status_code != 404:
+            # Server errors and throttling are transient; only a 404 means the release has no cover
+            self.logger.warning(f"Could not fetch cover art for release ID '{release_id}' (Status: {response.status_code})")
+            return Uncached(None)
+        
         self.logger.warning(f"No cover art found for release ID '{release_id}' (Status: {response.status_code})")
         return None
     
@@ -3,15 +3,14 @@
 @brief Cog for fetching lyrics from Genius using their search API and web scraping.
 """
 import logging
-import requests
 import json
 from bs4 import BeautifulSoup
 from typing import Optional, Dict, Any, List
-import traceback
 import re
 import urllib.parse
 
 from base_cog import BaseCog
+from request_cache import Uncached, cached
 from song import Song
 
 
@@ -93,9 +92,10 @@ class GeniusLyricsCog(BaseCog):
             
         except Exception as e:
             self.logger.error(f"Error processing Genius lyrics for {song.filepath}: {e}")
-            self.logger.error(traceback.format_exc())
+            self.logger.debug("Traceback:", exc_info=True)
             return False
     
+    @cached('genius_by_title', normalize=True)
     def get_lyrics_by_title(self, title: str) -> Optional[str]:
         """Search for lyrics using only the title.
         
@@ -120,7 +120,7 @@ class GeniusLyricsCog(BaseCog):
             self.logger.debug(f"Searching Genius API with title only: {api_url}")
             
             # Get search results from the API
-            response = requests.get(
+            response = self.session.get(
                 api_url, 
                 headers=headers
             )
@@ -153,7 +153,7 @@ class GeniusLyricsCog(BaseCog):
             
         except Exception as e:
             self.logger.error(f"Error searching Genius by title: {e}")
-            return None
+            return Uncached(None)
     
     def _extract_song_urls_from_api(self, search_data: Dict) -> List[str]:
         """Extract song URLs from the Genius API response.
@@ -206,6 +206,7 @@ class GeniusLyricsCog(BaseCog):
         
         return song_urls
     
+    @cached('genius_by_combined', normalize=True)
     def get_lyrics_by_combined(self, artist: str, title: str) -> Optional[str]:
         """Search for lyrics using artist and title.
         
@@ -231,7 +232,7 @@ class GeniusLyricsCog(BaseCog):
             self.logger.debug(f"Searching Genius API with artist and title: {api_url}")
             
             # Get search results from the API
-            response = requests.get(
+            response = self.session.get(
                 api_url, 
                 headers=headers
             )
@@ -264,8 +265,9 @@ class GeniusLyricsCog(BaseCog):
             
         except Exception as e:
             self.logger.error(f"Error searching Genius by artist and title: {e}")
-            return None
+            return Uncached(None)
     
+    @cached('genius_by_artist', normalize=True)
     def get_lyrics_by_artist(self, artist: str) -> Optional[str]:
         """Search for lyrics using only the artist.
         
@@ -290,7 +292,7 @@ class GeniusLyricsCog(BaseCog):
             self.logger.debug(f"Searching Genius API with artist only: {api_url}")
             
             # Get search results from the API
-            response = requests.get(
+            response = self.session.get(
                 api_url, 
                 headers=headers
             )
@@ -323,7 +325,7 @@ class GeniusLyricsCog(BaseCog):
             
         except Exception as e:
             self.logger.error(f"Error searching Genius by artist: {e}")
-            return None
+            return Uncached(None)
     
     def _scrape_lyrics_from_url(self, url: str) -> Optional[str]:
         """Scrape lyrics from Genius URL.
@@ -341,7 +343,7 @@ class GeniusLyricsCog(BaseCog):
             
             self.logger.debug(f"Fetching lyrics from URL: {url}")
             
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url, headers=self.headers)
             response.raise_for_status()
             
             # Log response details
@@ -476,8 +478,9 @@ class GeniusLyricsCog(BaseCog):
             
         except Exception as e:
             self.logger.error(f"Error scraping lyrics from {url}: {e}")
-            self.logger.error(traceback.format_exc())
-            return None
+            self.logger.debug("Traceback:", exc_info=True)
+            # Let the search method see the failure so it isn't cached as "no lyrics"
+            raise
     
     def _clean_lyrics(self, lyrics: str) -> str:
         """Clean and format lyrics text.
@@ -7,6 +7,7 @@ import requests
 from typing import Optional, Dict, Any
 
 from base_cog import BaseCog
+from request_cache import Uncached, cached
 from song import Song
 
 
@@ -70,9 +71,13 @@ class LrclibLyricsCog(BaseCog):
             self.logger.error(f"Error processing LRCLIB lyrics for {song.filepath}: {e}")
             return False
     
+    @cached('lrclib_lyrics', normalize=True)
     def get_lyrics(self, track_name: str, artist_name: str, album_name: str, duration: float) -> Optional[str]:
         """Fetch lyrics for a song from LRCLIB.
         
+        A track LRCLIB answered for but has no synced lyrics is cached as a
+        miss; a lookup where a request failed is not, so it is retried.
+        
         Args:
             track_name: Track name
             artist_name: Artist name
@@ -90,6 +95,8 @@ class LrclibLyricsCog(BaseCog):
             artist_name_get = ", ".join(artist_name.split(";"))
             artist_name = artist_name.split(";")[0]
         
+        failed = False
+        
         # Method 1: Direct get request
         try:
             lrclib_get_url = (
@@ -101,15 +108,18 @@ class LrclibLyricsCog(BaseCog):
             )
             
             self.logger.debug(f"LRCLIB direct request URL: {lrclib_get_url}")
-            lrclib_get_response = requests.get(lrclib_get_url, timeout=10)
+            lrclib_get_response = self.session.get(lrclib_get_url, timeout=10)
 
             if lrclib_get_response.status_code == 200:
                 json_data = lrclib_get_response.json()
                 if json_data and json_data.get("syncedLyrics"):
                     self.logger.info(f"Found lyrics from LRCLIB Get for {track_name}")
                     return json_data["syncedLyrics"]
+            elif lrclib_get_response.status_code != 404:
+                failed = True
         except Exception as e:
             self.logger.error(f"Error in LRCLIB direct request: {e}")
+            failed = True
         
         # Method 2: Search request
         try:
@@ -119,7 +129,7 @@ class LrclibLyricsCog(BaseCog):
             )
             
             self.logger.debug(f"LRCLIB search request URL: {lrclib_search_url}")
-            lrclib_search_response = requests.get(lrclib_search_url, timeout=10)
+            lrclib_search_response = self.session.get(lrclib_search_url, timeout=10)
             
             if lrclib_search_response.status_code == 200:
                 json_data = lrclib_search_response.json()
@@ -133,7 +143,10 @@ class LrclibLyricsCog(BaseCog):
                             song["syncedLyrics"]):
                             self.logger.info(f"Found lyrics from LRCLIB Search for {track_name}")
                             return song["syncedLyrics"]
+            else:
+                failed = True
         except Exception as e:
             self.logger.error(f"Error in LRCLIB search request: {e}")
+            failed = True
         
-        return None
\ No newline at end of file
+        return Uncached(None) if failed else None
\ No newline at end of file
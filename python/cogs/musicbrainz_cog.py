@@ -3,9 +3,9 @@ from typing import Optional, Dict, Any, List, Tuple
 import logging
 import json
 import difflib
-import traceback
-import requests
 from base_cog import BaseCog
+from http_session import acquire_host
+from request_cache import cached
 from song import Song
 
 class MusicBrainzCog(BaseCog):
@@ -34,6 +34,8 @@ class MusicBrainzCog(BaseCog):
             "imsoupp@protonmail.com"
         )
         musicbrainzngs.set_format("json")
+        # Requests go through the shared musicbrainz.org bucket instead, so the 1 req/s limit holds across cogs
+        musicbrainzngs.set_rate_limit(False)
     
     def process(self, song: Song) -> bool:
         if not self.can_process(song):
@@ -79,6 +81,7 @@ class MusicBrainzCog(BaseCog):
         self.logger.info(f"Successfully processed MusicBrainz metadata for {song.filepath}")
         return True
     
+    @cached('musicbrainz_recording_releases')
     def _direct_fetch_release_for_recording(self, recording_id: str) -> Dict[str, Any]:
         headers = {
             'User-Agent': "tinfoil/1.0 ( imsoupp@protonmail.com )"
@@ -86,16 +89,16 @@ class MusicBrainzCog(BaseCog):
         
         url = f"https://musicbrainz.org/ws/2/recording/{recording_id}?fmt=json&inc=releases"
         
-        self.logger.debug(f"Making direct request to MusicBrainz API: {url}")
+        self.logger.debug("Making direct request to MusicBrainz API: %s", url)
         
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url, headers=headers)
         response.raise_for_status()
         
         data = response.json()
-        self.logger.debug(f"Received direct response with keys: {list(data.keys())}")
+        self.logger.debug("Received direct response with keys: %s", list(data))
         
         if 'releases' in data:
-            self.logger.debug(f"Found {len(data['releases'])} releases in response")
+            self.logger.debug("Found %d releases in response", len(data['releases']))
         else:
             self.logger.debug("No 'releases' key in response")
         
@@ -115,6 +118,13 @@ class MusicBrainzCog(BaseCog):
             return 0.0
         return difflib.SequenceMatcher(None, str1.lower(), str2.lower()).ratio()
     
+    def similarity_upper_bound(self, str1: str, str2: str) -> float:
+        # SequenceMatcher.ratio() can never exceed 2*min(len)/(len1+len2)
+        if not str1 or not str2:
+            return 0.0
+        len1, len2 = len(str1), len(str2)
+        return 2.0 * min(len1, len2) / (len1 + len2)
+    
     def find_best_matching_release(
         self,
         releases: List[Dict[str, Any]],
@@ -123,29 +133,37 @@ class MusicBrainzCog(BaseCog):
         best_match = None
         best_score = 0.0
         
+        target_album = existing_metadata.get('album', '')
+        target_artist = existing_metadata.get('albumartist', existing_metadata.get('artist', ''))
+        
         for release in releases:
-            title_score = self.calculate_similarity(
-                release.get('title', ''),
-                existing_metadata.get('album', '')
-            )
+            release_title = release.get('title', '')
             
             artist_name = ''
             if 'artist-credit' in release:
                 artist_name = self.get_english_artist(release['artist-credit'])
             
-            artist_score = self.calculate_similarity(
-                artist_name,
-                existing_metadata.get('albumartist', existing_metadata.get('artist', ''))
+            # Skip the expensive comparison when the lengths alone rule the release out
+            max_score = (
+                self.similarity_upper_bound(release_title, target_album) * 0.6 +
+                self.similarity_upper_bound(artist_name, target_artist) * 0.4
             )
+            if max_score <= max(best_score, 0.5):
+                continue
+            
+            title_score = self.calculate_similarity(release_title, target_album)
+            artist_score = self.calculate_similarity(artist_name, target_artist)
             
             total_score = (title_score * 0.6) + (artist_score * 0.4)
             
             self.logger.debug(
-                f"Release '{release.get('title')}' scores - "
-                f"Title: {title_score:.2f}, Artist: {artist_score:.2f}, "
-                f"Total: {total_score:.2f}"
+                "Release '%s' scores - Title: %.2f, Artist: %.2f, Total: %.2f",
+                release.get('title'), title_score, artist_score, total_score
             )
             
+            if total_score >= 0.95:
+                return release
+            
             if total_score > best_score:
                 best_score = total_score
                 best_match = release
@@ -156,6 +174,7 @@ class MusicBrainzCog(BaseCog):
         includes = ["artists", "releases", "artist-credits"]
         self.logger.info(f"Fetching MusicBrainz recording: {recording_id}")
         
+        acquire_host('musicbrainz.org')
         result = musicbrainzngs.get_recording_by_id(
             recording_id,
             includes=includes
@@ -168,10 +187,12 @@ class MusicBrainzCog(BaseCog):
         self.logger.warning("No recording data found in response")
         return None
     
+    @cached('musicbrainz_release')
     def get_release_metadata(self, release_id: str) -> Optional[Dict[str, Any]]:
         includes = ["artists", "recordings", "artist-credits", "labels", "media"]
         self.logger.info(f"Fetching MusicBrainz release: {release_id}")
         
+        acquire_host('musicbrainz.org')
         result = musicbrainzngs.get_release_by_id(
             release_id,
             includes=includes
@@ -182,16 +203,13 @@ class MusicBrainzCog(BaseCog):
         return None
     
     def find_english_release(self, releases: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-        for release in releases:
-            if release.get('text-representation', {}).get('language') == 'eng':
-                return release
-        return None
+        return next(
+            (r for r in releases if r.get('text-representation', {}).get('language') == 'eng'),
+            None
+        )
     
     def find_official_release(self, releases: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-        for release in releases:
-            if release.get('status') == 'Official':
-                return release
-        return None
+        return next((r for r in releases if r.get('status') == 'Official'), None)
     
     def has_date(self, release: Dict[str, Any]) -> bool:
         if 'date' in release and release['date']:
@@ -257,36 +275,41 @@ class MusicBrainzCog(BaseCog):
         else:
             date_release = self.find_official_release(releases)
             if not (date_release and self.has_date(date_release)):
-                for release in releases:
-                    if self.has_date(release):
-                        date_release = release
-                        break
-                else:
-                    date_release = album_release
+                date_release = next(
+                    (r for r in releases if self.has_date(r)),
+                    album_release
+                )
         
         return album_release, date_release
     
+    def _index_release_tracks(self, release: Dict[str, Any]) -> Dict[str, Tuple[int, Any]]:
+        index: Dict[str, Tuple[int, Any]] = {}
+        for media_key, track_key in [('media', 'tracks'), ('medium-list', 'track-list')]:
+            if media_key in release:
+                for disc_num, medium in enumerate(release[media_key], 1):
+                    for track in medium.get(track_key, []):
+                        position = track.get('position', 0)
+                        for rid in (track.get('recording', {}).get('id'), track.get('recording-id')):
+                            if rid:
+                                index.setdefault(rid, (disc_num, position))
+        return index
+    
+    def _get_track_index(self, release: Dict[str, Any]) -> Dict[str, Tuple[int, Any]]:
+        index = release.get('_track_index')
+        if index is None:
+            index = release['_track_index'] = self._index_release_tracks(release)
+        return index
+    
     def get_track_number(
         self,
         release: Dict[str, Any],
         recording_id: str
     ) -> Optional[int]:
-        for media_key, track_key in [('media', 'tracks'), ('medium-list', 'track-list')]:
-            if media_key in release:
-                for medium in release[media_key]:
-                    for track in medium.get(track_key, []):
-                        recording_match = False
-                        
-                        if track.get('recording', {}).get('id') == recording_id:
-                            recording_match = True
-                        
-                        if track.get('recording-id') == recording_id:
-                            recording_match = True
-                        
-                        if recording_match:
-                            position = track.get('position', 0)
-                            if isinstance(position, (int, str)) and str(position).isdigit():
-                                return int(position)
+        entry = self._get_track_index(release).get(recording_id)
+        if entry:
+            position = entry[1]
+            if isinstance(position, (int, str)) and str(position).isdigit():
+                return int(position)
         
         return None
     
@@ -295,22 +318,8 @@ class MusicBrainzCog(BaseCog):
         release: Dict[str, Any],
         recording_id: str
     ) -> Optional[int]:
-        for media_key, track_key in [('media', 'tracks'), ('medium-list', 'track-list')]:
-            if media_key in release:
-                for i, medium in enumerate(release[media_key], 1):
-                    for track in medium.get(track_key, []):
-                        recording_match = False
-                        
-                        if track.get('recording', {}).get('id') == recording_id:
-                            recording_match = True
-                        
-                        if track.get('recording-id') == recording_id:
-                            recording_match = True
-                        
-                        if recording_match:
-                            return i
-        
-        return None
+        entry = self._get_track_index(release).get(recording_id)
+        return entry[0] if entry else None
     
     def _prepare_metadata(
         self,
@@ -92,7 +92,7 @@ class NeteaseLyricsCog(BaseCog):
             
             # Set user agent to avoid blocking
             headers = {'User-Agent': self.user_agent}
-            netease_response = requests.get(netease_url, headers=headers, timeout=10)
+            netease_response = self.session.get(netease_url, headers=headers, timeout=10)
             
             if netease_response.status_code == 200:
                 json_data = netease_response.json()
@@ -135,7 +135,7 @@ class NeteaseLyricsCog(BaseCog):
             headers = {'User-Agent': self.user_agent}
             
             self.logger.debug(f"NetEase lyrics URL: {lyric_url}")
-            lyric_response = requests.get(lyric_url, headers=headers, timeout=10)
+            lyric_response = self.session.get(lyric_url, headers=headers, timeout=10)
             
             if lyric_response.status_code == 200:
                 js = lyric_response.json()
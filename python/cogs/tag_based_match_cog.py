@@ -1,6 +1,6 @@
 """
 @file tag_based_match_cog.py
-@brief Cog for finding matches based on existing tags when AcoustID fails.
+@brief Cog for finding matches based on existing tags before falling back to AcoustID.
 """
 import logging
 import difflib
@@ -8,11 +8,12 @@ import musicbrainzngs
 from typing import Optional, Dict, Any, List, Tuple
 
 from base_cog import BaseCog
+from http_session import acquire_host
 from song import Song
 
 
 class TagBasedMatchCog(BaseCog):
-    """Find MusicBrainz matches based on existing tags when AcoustID fails."""
+    """Find MusicBrainz matches based on existing tags, so AcoustID only fingerprints what this misses."""
     
     # Define what tags this cog needs as input - we'll look for any of these
     input_tags = []  # No mandatory tags, we'll use whatever is available
@@ -48,6 +49,8 @@ class TagBasedMatchCog(BaseCog):
             "imsoupp@protonmail.com"
         )
         musicbrainzngs.set_format("json")
+        # Requests go through the shared musicbrainz.org bucket instead, so the 1 req/s limit holds across cogs
+        musicbrainzngs.set_rate_limit(False)
     
     def process(self, song: Song) -> bool:
         """Find MusicBrainz match based on existing tags.
@@ -84,6 +87,8 @@ class TagBasedMatchCog(BaseCog):
             # Add recording ID to song metadata
             metadata = {'musicbrainz_recordingid': recording_id}
             self.merge_metadata(song, metadata)
+            # Later cogs (AcoustID) decide from this whether the match is good enough to rely on
+            song.match_score = self._calculate_similarity_score(recording_data, existing_metadata)
             
             # We successfully found a musicbrainz_recordingid - the MusicBrainzCog can
             # now use this to get full metadata
@@ -168,6 +173,7 @@ class TagBasedMatchCog(BaseCog):
             self.logger.info(f"Searching MusicBrainz with query: {query}")
             
             # Search recordings in MusicBrainz
+            acquire_host('musicbrainz.org')
             result = musicbrainzngs.search_recordings(query=query, limit=10)
             
             self.logger.debug(f"MusicBrainz search result: {result}")
@@ -0,0 +1,118 @@
+"""
+@file http_session.py
+@brief Process-wide HTTP session shared by all network cogs.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# One pool per API host; enough connections per host for a full worker pool
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 32
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` requests every `per` seconds."""
+    
+    def __init__(self, rate: int, per: float = 1.0):
+        """Initialize the bucket full.
+        
+        Args:
+            rate: Requests allowed per period (also the burst size)
+            per: Period length in seconds
+        """
+        self.rate = rate
+        self.per = per
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is available.
+        
+        Returns:
+            float: Seconds spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.per)
+            self._updated = now
+            
+            # Reserve the token even when we have to wait, so callers queue up in order
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) * self.per / self.rate
+            self._tokens -= 1
+        
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+# Published limits: MusicBrainz allows 1 req/s per client, AcoustID 3 req/s
+HOST_RATE_LIMITS: Dict[str, RateLimiter] = {
+    'musicbrainz.org': RateLimiter(1, 1.0),
+    'api.acoustid.org': RateLimiter(3, 1.0),
+    'genius.com': RateLimiter(5, 1.0),
+}
+
+
+def acquire_host(host: Optional[str]) -> float:
+    """Wait for a host's rate limiter, if it has one.
+    
+    Clients that don't send their requests through the shared session (such
+    as musicbrainzngs) call this before each request, so every request to a
+    host draws from the same bucket.
+    
+    Args:
+        host: Destination hostname
+    
+    Returns:
+        float: Seconds spent waiting
+    """
+    limiter = HOST_RATE_LIMITS.get(host)
+    if not limiter:
+        return 0.0
+    
+    waited = limiter.acquire()
+    if waited:
+        logger.debug(f"Rate limit reached for {host}, waited {waited:.2f}s")
+    return waited
+
+
+class RateLimitedSession(requests.Session):
+    """Session that waits for the destination host's rate limiter before each request."""
+    
+    def request(self, method, url, *args, **kwargs):
+        acquire_host(urlsplit(url).hostname)
+        return super().request(method, url, *args, **kwargs)
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Return the shared session, creating it on first use.
+    
+    Reusing one session keeps TCP/TLS connections to each API host alive
+    across requests, files and cogs instead of handshaking on every call.
+    
+    Returns:
+        requests.Session: Shared session
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = RateLimitedSession()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
@@ -1,18 +1,40 @@
 from pathlib import Path
-from typing import List, Optional, Dict, Any, Type
+from typing import List, Optional, Dict, Any, Type, Callable, Tuple
 import logging
+import os
+import queue
 import shutil
+import string
+import threading
 import re
+from collections import Counter
 
+from audio_files import walk_audio_files
 from base_cog import BaseCog
+from request_cache import RequestCache
 from song import Song
 
+# Sentinel telling a pipeline stage worker to exit
+_STAGE_DONE = object()
+
+_INVALID_FILENAME_CHARS = str.maketrans('\\/*?:"<>|', '_' * 9)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Path components that may be shortened when the output path is too long
+_TRIMMABLE_FIELDS = ('title', 'album', 'artist')
+
+# Locks that serialise saves to the same output path
+_SAVE_LOCK_STRIPES = 64
+
 class TinfoilProcessor:
     def __init__(
         self,
         pipeline: List[BaseCog],
         output_pattern: Optional[str] = None,
-        logger: Optional[logging.Logger] = None
+        logger: Optional[logging.Logger] = None,
+        max_workers: int = 4,
+        ingest_workers: int = 2,
+        request_cache: Optional[RequestCache] = None
     ):
         self.logger = logger if logger else logging.getLogger(__name__)
         
@@ -20,16 +42,52 @@ class TinfoilProcessor:
             raise ValueError("A cog pipeline must be provided to the processor.")
         
         self.cogs = pipeline
+        if request_cache:
+            for cog in self.cogs:
+                cog.request_cache = request_cache
+        # Per-cog lookups done once here instead of for every file
+        self._cog_descriptors = [
+            (cog.__class__.__name__, cog.can_process, cog.process, cog._output_tags_set)
+            for cog in self.cogs
+        ]
         self.logger.info(f"Processor initialized with {len(self.cogs)} cogs: {[c.__class__.__name__ for c in self.cogs]}")
 
         self.output_pattern = output_pattern if output_pattern else "{artist}/{year} - {album}/{track:02d} - {title}"
         self.max_filename_length = 250
-        self.supported_formats = ['.flac']
+        # How many times each trimmable field appears in the pattern
+        pattern_fields = Counter(
+            field_name for _, field_name, _, _ in string.Formatter().parse(self.output_pattern) if field_name
+        )
+        self._trimmable_fields = {name: pattern_fields[name] for name in _TRIMMABLE_FIELDS if pattern_fields[name]}
+        self.supported_formats = frozenset({'.flac'})
+        self.max_workers = max(1, max_workers)
+        # Saving is bound by the disk, not the network; a couple of writers is enough
+        self.ingest_workers = max(1, ingest_workers)
+        # Output directories already created during this processor's lifetime
+        self._created_dirs = set()
+        self._created_dirs_lock = threading.Lock()
+        # Two songs can format to the same output path; writes to one path are serialised through these
+        self._save_locks = [threading.Lock() for _ in range(_SAVE_LOCK_STRIPES)]
 
     def process_file(self, file_path: Path, output_dir: Path, force_update: bool = False) -> bool:
+        return self.process_file_to(file_path, output_dir, force_update) is not None
+    
+    def process_file_to(self, file_path: Path, output_dir: Path, force_update: bool = False) -> Optional[Path]:
+        """Process a single file, returning the path it was saved to (None on failure)."""
+        self._forget_created_dirs()
+        song = self._load_song(file_path, force_update)
+        if not song:
+            return None
+        
+        for descriptor in self._cog_descriptors:
+            self._run_cog(descriptor, song, force_update)
+        
+        return self._save_song(song, output_dir)
+    
+    def _load_song(self, file_path: Path, force_update: bool = False) -> Optional[Song]:
         if not file_path or not file_path.exists():
             self.logger.error(f"File not found: {file_path}")
-            return False
+            return None
         
         self.logger.info(f"Processing file: {file_path}")
         
@@ -37,59 +95,94 @@ class TinfoilProcessor:
             song = Song(file_path, self.logger)
         except (FileNotFoundError, ValueError) as e:
             self.logger.error(f"Failed to load song {file_path}: {e}")
-            return False
+            return None
+        
+        song.force_update = force_update
+        return song
+    
+    def _run_cog(self, descriptor: Tuple[str, Callable, Callable, frozenset], song: Song, force_update: bool) -> None:
+        cog_name, can_process, process, output_tags = descriptor
+        file_path = song.filepath
+        
+        # Check if all output tags for this cog already exist in the metadata
+        if not force_update and output_tags.issubset(song.all_metadata.keys()):
+            self.logger.info(f"Skipping {cog_name} for {file_path}, all output tags already exist.")
+            return
+        
+        if not can_process(song):
+            self.logger.debug(f"{cog_name} cannot process {file_path} due to missing input tags.")
+            return
+        
+        self.logger.info(f"Executing cog '{cog_name}' for {file_path}")
+        try:
+            if not process(song):
+                self.logger.warning(f"Cog '{cog_name}' processing failed for {file_path}")
+        except Exception as e:
+            self.logger.error(f"An exception occurred in cog '{cog_name}' for {file_path}: {e}", exc_info=True)
+    
+    def _save_song(self, song: Song, output_dir: Path) -> Optional[Path]:
+        file_path = song.filepath
         
-        for cog in self.cogs:
-            cog_name = cog.__class__.__name__
-            
-            # Check if all output tags for this cog already exist in the metadata
-            if not force_update and all(tag in song.all_metadata for tag in cog.output_tags if cog.output_tags):
-                self.logger.info(f"Skipping {cog_name} for {file_path}, all output tags already exist.")
-                continue
-            
-            if not cog.can_process(song):
-                self.logger.debug(f"{cog_name} cannot process {file_path} due to missing input tags.")
-                continue
-            
-            self.logger.info(f"Executing cog '{cog_name}' for {file_path}")
-            try:
-                if not cog.process(song):
-                    self.logger.warning(f"Cog '{cog_name}' processing failed for {file_path}")
-            except Exception as e:
-                self.logger.error(f"An exception occurred in cog '{cog_name}' for {file_path}: {e}", exc_info=True)
-
         output_path = self._generate_output_path(song, output_dir)
         if not output_path:
             self.logger.warning(f"Could not generate output path for {file_path}")
             # Still try to save metadata to the original file if an output path can't be made
             if song.save_overwrite():
                 self.logger.info(f"Successfully updated metadata for original file: {file_path}")
-                return True
-            return False
+                return file_path
+            return None
         
-        if not output_path.parent.exists():
-            output_path.parent.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(output_path.parent)
         
-        # If the destination is the same as the source, just save over it.
-        if output_path.resolve() == file_path.resolve():
-            self.logger.info(f"Output path is the same as input; saving metadata to {file_path}")
-            if song.save_overwrite():
-                self.logger.info(f"Successfully processed and saved {file_path}")
-                return True
-        else:
-            # Otherwise, copy to the new location and save metadata there.
-            new_song = song.copy_to(output_path)
-            if not new_song:
-                self.logger.error(f"Could not copy {file_path} to {output_path}")
-                return False
-            
-            new_song.all_metadata = song.all_metadata.copy()
-            if new_song.save_overwrite():
-                self.logger.info(f"Successfully processed {file_path} to {output_path}")
-                return True
+        with self._save_lock_for(output_path):
+            # If the destination is the same as the source, just save over it.
+            if self._is_same_file(file_path, output_path):
+                # Nothing was changed by the cogs (the usual re-run case); skip rewriting the file
+                if not song.is_modified():
+                    self.logger.info(f"No metadata changes for {file_path}; leaving file untouched")
+                    return file_path
+                
+                self.logger.info(f"Output path is the same as input; saving metadata to {file_path}")
+                if song.save_overwrite():
+                    self.logger.info(f"Successfully processed and saved {file_path}")
+                    return file_path
+            else:
+                # Otherwise, write the file with its metadata to the new location in one pass.
+                if song.write_to(output_path):
+                    self.logger.info(f"Successfully processed {file_path} to {output_path}")
+                    return output_path
         
         self.logger.error(f"Could not save metadata for {file_path}")
-        return False
+        return None
+    
+    def _save_lock_for(self, output_path: Path) -> threading.Lock:
+        # Striped by the normalised absolute path: bounded, and one path always maps to the same lock
+        key = os.path.normcase(os.path.abspath(output_path))
+        return self._save_locks[hash(key) % _SAVE_LOCK_STRIPES]
+    
+    def _is_same_file(self, file_path: Path, output_path: Path) -> bool:
+        if output_path.resolve() == file_path.resolve():
+            return True
+        # Catches hard links and case-insensitive filesystems, where the paths differ
+        try:
+            return output_path.exists() and os.path.samefile(file_path, output_path)
+        except OSError:
+            return False
+    
+    def _forget_created_dirs(self) -> None:
+        # A processor can be reused across jobs; output directories may have been removed since
+        with self._created_dirs_lock:
+            self._created_dirs.clear()
+    
+    def _ensure_dir(self, directory: Path) -> None:
+        with self._created_dirs_lock:
+            if directory in self._created_dirs:
+                return
+        
+        directory.mkdir(parents=True, exist_ok=True)
+        
+        with self._created_dirs_lock:
+            self._created_dirs.add(directory)
     
     def _generate_output_path(self, song: Song, output_dir: Path) -> Optional[Path]:
         if not song or not hasattr(song, 'all_metadata'):
@@ -111,6 +204,7 @@ class TinfoilProcessor:
         disc = int(disc_str.split('/')[0]) if disc_str.split('/')[0].isdigit() else 1
         
         # Safely format the output path
+        format_vars = None
         try:
             format_vars = {
                 'artist': self._clean_filename(artist),
@@ -125,30 +219,58 @@ class TinfoilProcessor:
             self.logger.error(f"Invalid output pattern or missing metadata for formatting: {e}")
             # Fallback to a simple file name in the output directory
             rel_path_str = self._clean_filename(song.filepath.name)
+            format_vars = None
 
         rel_path = f"{rel_path_str}{song.filepath.suffix}"
         
         output_path = output_dir / rel_path
         
         # Truncate path if it's too long
-        if len(str(output_path)) > self.max_filename_length:
+        excess = len(str(output_path)) - self.max_filename_length
+        if excess > 0 and format_vars is not None and self._trimmable_fields:
             self.logger.warning(f"Generated path is too long, attempting to shorten: {output_path}")
-            title_short = (title[:50] + '...') if len(title) > 53 else title
-            format_vars['title'] = self._clean_filename(title_short)
+            self._trim_format_vars(format_vars, excess)
             rel_path_str = self.output_pattern.format(**format_vars)
             rel_path = f"{rel_path_str}{song.filepath.suffix}"
             output_path = output_dir / rel_path
 
         return output_path
     
+    def _trim_format_vars(self, format_vars: Dict[str, Any], excess: int) -> None:
+        """Shorten the longest text components until the path loses `excess` characters.
+        
+        The longest of title/album/artist is cut down towards the next longest
+        one at each step, so a single oversized component is trimmed first and
+        no component is cut more than needed.
+        """
+        lengths = {name: len(format_vars[name]) for name in self._trimmable_fields}
+        
+        while excess > 0:
+            ranked = sorted(lengths, key=lengths.get, reverse=True)
+            longest = ranked[0]
+            if lengths[longest] <= 1:
+                break
+            
+            floor = lengths[ranked[1]] if len(ranked) > 1 else 0
+            occurrences = self._trimmable_fields[longest]
+            needed = -(-excess // occurrences)
+            cut = min(needed, max(lengths[longest] - floor, 1), lengths[longest] - 1)
+            
+            lengths[longest] -= cut
+            excess -= cut * occurrences
+        
+        for name, length in lengths.items():
+            if length < len(format_vars[name]):
+                format_vars[name] = format_vars[name][:length].rstrip(' .') or "Unknown"
+    
     def _clean_filename(self, filename: str) -> str:
         if not filename:
             return "Unknown"
         
         # Replace invalid characters with an underscore
-        cleaned = re.sub(r'[\\/*?:"<>|]', '_', str(filename))
+        cleaned = str(filename).translate(_INVALID_FILENAME_CHARS)
         # Collapse whitespace
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+        cleaned = _WHITESPACE_RE.sub(' ', cleaned).strip()
         
         return cleaned if cleaned else "Unknown"
     
@@ -156,25 +278,139 @@ class TinfoilProcessor:
         input_dir = Path(input_dir)
         output_dir = Path(output_dir)
         
-        if not output_dir.exists():
-            output_dir.mkdir(parents=True, exist_ok=True)
+        output_dir.mkdir(parents=True, exist_ok=True)
         
         audio_files = self._get_audio_files(input_dir)
         self.logger.info(f"Found {len(audio_files)} compatible audio files in {input_dir}")
         
-        processed_files = []
-        for file_path in audio_files:
-            if self.process_file(file_path, output_dir, force_update):
-                processed_files.append(file_path)
+        processed_files = self.process_files(audio_files, output_dir, force_update)
         
         self.logger.info(f"Successfully processed {len(processed_files)} of {len(audio_files)} files")
         return processed_files
     
-    def _get_audio_files(self, directory: Path) -> List[Path]:
-        audio_files = []
+    def process_files(
+        self,
+        audio_files: List[Path],
+        output_dir: Path,
+        force_update: bool = False,
+        on_result: Optional[Callable[[Path, bool], None]] = None
+    ) -> List[Path]:
+        """Process a list of files concurrently, returning the ones that succeeded.
+        
+        on_result, if given, is called from the calling thread as each file
+        finishes, while later files are still being fed in. Exceptions it
+        raises are logged and do not stop the batch.
+        """
+        return self._run_pipeline(list(audio_files), Path(output_dir), force_update, on_result)
+    
+    def _run_pipeline(
+        self,
+        audio_files: List[Path],
+        output_dir: Path,
+        force_update: bool,
+        on_result: Optional[Callable[[Path, bool], None]] = None
+    ) -> List[Path]:
+        """Run files through load -> one stage per cog -> save.
         
-        for file_path in directory.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in self.supported_formats:
-                audio_files.append(file_path)
+        Every stage has its own bounded queue and worker threads, so while one
+        file waits on a slow cog, later files are already moving through the
+        earlier stages. The save stage has its own smaller writer pool, so
+        copying files to the output directory never holds up metadata fetches.
+        A file that fails is passed along as None so the final count still sees it.
+        """
+        self._forget_created_dirs()
         
-        return audio_files
\ No newline at end of file
+        stages = [(lambda file_path: self._load_song(file_path, force_update), self.max_workers)]
+        for descriptor in self._cog_descriptors:
+            stages.append((
+                lambda song, descriptor=descriptor: self._run_cog(descriptor, song, force_update) or song,
+                self.max_workers
+            ))
+        stages.append((lambda song: self._save_song(song, output_dir), self.ingest_workers))
+        
+        queues = [queue.Queue(maxsize=self.max_workers * 2) for _ in stages]
+        queues.append(queue.Queue())
+        # Set when the caller stops early; workers then pass items through without working on them
+        cancelled = threading.Event()
+        
+        workers = []
+        for index, (work, worker_count) in enumerate(stages):
+            for _ in range(worker_count):
+                worker = threading.Thread(
+                    target=self._stage_worker,
+                    args=(work, queues[index], queues[index + 1], cancelled),
+                    daemon=True
+                )
+                worker.start()
+                workers.append(worker)
+        
+        produced = 0
+        
+        def produce():
+            nonlocal produced
+            for file_path in audio_files:
+                if cancelled.is_set():
+                    return
+                queues[0].put((file_path, file_path))
+                produced += 1
+        
+        # Files are fed from their own thread so results are drained (and reported) while input is still queued
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        
+        processed_files = []
+        received = 0
+        try:
+            for _ in audio_files:
+                file_path, success = queues[-1].get()
+                received += 1
+                if success:
+                    processed_files.append(file_path)
+                if on_result:
+                    try:
+                        on_result(file_path, bool(success))
+                    except Exception as e:
+                        # A failing progress callback must not abandon the rest of the batch
+                        self.logger.error(f"Result callback failed for {file_path}: {e}", exc_info=True)
+        finally:
+            if received < len(audio_files):
+                # Let what is already in flight run out, so no worker is left blocked on a full queue
+                cancelled.set()
+                producer.join()
+                for _ in range(produced - received):
+                    queues[-1].get()
+            producer.join()
+            
+            for stage_queue, (_, worker_count) in zip(queues, stages):
+                for _ in range(worker_count):
+                    stage_queue.put(_STAGE_DONE)
+            for worker in workers:
+                worker.join()
+        
+        return processed_files
+    
+    def _stage_worker(
+        self,
+        work: Callable[[Any], Any],
+        inbox: queue.Queue,
+        outbox: queue.Queue,
+        cancelled: threading.Event
+    ) -> None:
+        while True:
+            item = inbox.get()
+            if item is _STAGE_DONE:
+                return
+            
+            file_path, value = item
+            if cancelled.is_set():
+                value = None
+            if value is not None:
+                try:
+                    value = work(value)
+                except Exception as e:
+                    self.logger.error(f"An exception occurred while processing {file_path}: {e}", exc_info=True)
+                    value = None
+            outbox.put((file_path, value))
+    
+    def _get_audio_files(self, directory: Path) -> List[Path]:
+        return [Path(entry.path) for entry in walk_audio_files(str(directory), self.supported_formats)]
\ No newline at end of file
@@ -0,0 +1,299 @@
+"""
+@file request_cache.py
+@brief Persistent SQLite cache for responses fetched by network cogs.
+"""
+import functools
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+# Found results rarely change upstream; misses are retried sooner
+HIT_TTL = 30 * 86400
+MISS_TTL = 86400
+
+# Expired rows are deleted on open and again after this many writes
+PRUNE_EVERY = 500
+# Larger values (e.g. huge cover images) are not stored at all
+MAX_VALUE_BYTES = 4 * 1024 * 1024
+# Past this total size the oldest entries are evicted, even if still fresh
+MAX_TOTAL_BYTES = 256 * 1024 * 1024
+
+
+class RequestCache:
+    """A small key/value store for API responses, shared by every cog in a pipeline.
+    
+    Values are stored either as JSON or as raw bytes (for images), together
+    with the time they were fetched and how long they stay valid. Expired
+    rows are pruned periodically, and the total size is kept under
+    MAX_TOTAL_BYTES by evicting the oldest entries.
+    """
+    
+    def __init__(self, db_path: Union[str, Path], logger: Optional[logging.Logger] = None):
+        """Open (or create) the cache database.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            logger: Logger instance
+        """
+        self.db_path = Path(db_path)
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value BLOB, is_json INTEGER, fetched_at INTEGER, ttl INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_fetched_at ON responses (fetched_at)")
+        self._conn.commit()
+        
+        with self._lock:
+            self._prune_locked()
+    
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Look up a cached value.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Tuple[bool, Any]: (True, value) on a fresh hit, (False, None) otherwise
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, is_json, fetched_at, ttl FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+        
+        if not row:
+            return False, None
+        
+        value, is_json, fetched_at, ttl = row
+        if time.time() - fetched_at > ttl:
+            return False, None
+        
+        if is_json:
+            return True, json.loads(value)
+        return True, bytes(value)
+    
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        """Store a value.
+        
+        Args:
+            key: Cache key
+            value: JSON-serializable value or bytes
+            ttl: Seconds the value stays valid
+        """
+        if isinstance(value, (bytes, bytearray)):
+            stored, is_json = sqlite3.Binary(value), 0
+        else:
+            stored, is_json = json.dumps(value), 1
+        
+        if len(stored) > MAX_VALUE_BYTES:
+            self.logger.debug(f"Not caching {key}: {len(stored)} bytes is over the size limit")
+            return
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, is_json, fetched_at, ttl) VALUES (?, ?, ?, ?, ?)",
+                (key, stored, is_json, int(time.time()), ttl)
+            )
+            self._conn.commit()
+            
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= PRUNE_EVERY:
+                self._prune_locked()
+    
+    def _prune_locked(self) -> None:
+        """Delete expired rows, then evict the oldest ones while over MAX_TOTAL_BYTES.
+        
+        Freed pages are reused by later writes, so the file stops growing
+        once it reaches the cap. Must be called with the lock held.
+        """
+        self._writes_since_prune = 0
+        
+        expired = self._conn.execute(
+            "DELETE FROM responses WHERE fetched_at + ttl < ?", (int(time.time()),)
+        ).rowcount
+        
+        # Keep the newest entries that fit under the cap; everything older goes
+        total = 0
+        evict = []
+        for key, size in self._conn.execute(
+            "SELECT key, COALESCE(LENGTH(value), 0) FROM responses ORDER BY fetched_at DESC"
+        ):
+            total += size
+            if total > MAX_TOTAL_BYTES:
+                evict.append((key,))
+        if evict:
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", evict)
+        evicted = len(evict)
+        
+        self._conn.commit()
+        if expired or evicted:
+            self.logger.debug(f"Request cache pruned {expired} expired and {evicted} evicted entries")
+    
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into a single call.
+    
+    The first caller for a key runs the function; callers that arrive while
+    it is still running wait for its result (or exception) instead of
+    issuing the same request again.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """Run func for key, or wait for the call already in flight.
+        
+        Args:
+            key: Key identifying the call
+            func: Function to run if no identical call is in flight
+        
+        Returns:
+            Any: The function's result
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+
+_single_flight = SingleFlight()
+
+
+class Uncached:
+    """A return value that must not be stored in the request cache.
+    
+    Cached methods return Uncached(None) when a lookup failed (a timeout, an
+    error status, a rejected API key) rather than confirming there is nothing
+    to find, so the next call asks again instead of reusing the failure.
+    The decorator unwraps it, so callers only ever see the value.
+    """
+    
+    __slots__ = ('value',)
+    
+    def __init__(self, value: Any = None):
+        """Wrap a value.
+        
+        Args:
+            value: Value returned to the caller
+        """
+        self.value = value
+
+
+def normalize_query(value: Any) -> Any:
+    """Normalize a free-text query argument so trivially different spellings share a key.
+    
+    Args:
+        value: Argument value
+    
+    Returns:
+        Any: Case-folded, whitespace-collapsed string, or the value unchanged if not a string
+    """
+    if isinstance(value, str):
+        return ' '.join(value.casefold().split())
+    return value
+
+
+def make_cache_key(namespace: str, *args: Any) -> str:
+    """Build a compact cache key from a namespace and call arguments.
+    
+    Args:
+        namespace: Name of the cached operation
+        *args: Arguments identifying the request
+    
+    Returns:
+        str: Cache key
+    """
+    digest = hashlib.sha1(json.dumps(args, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+def cached(namespace: str, ttl: int = HIT_TTL, miss_ttl: int = MISS_TTL, normalize: bool = False) -> Callable:
+    """Cache a cog method's return value in the cog's request cache.
+    
+    Concurrent calls with the same key are coalesced, so only one request
+    goes out while the others wait for its result. Without a request cache
+    on the cog, only this coalescing applies. A None result is cached as a
+    confirmed miss with the shorter miss_ttl; exceptions and Uncached
+    results are never cached.
+    
+    Args:
+        namespace: Name of the cached operation
+        ttl: Seconds a found result stays valid
+        miss_ttl: Seconds a None result stays valid
+        normalize: Build the key from case-folded, whitespace-collapsed
+            string arguments (for free-text searches)
+    
+    Returns:
+        Callable: Decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            cache = getattr(self, 'request_cache', None)
+            key_args = [normalize_query(arg) for arg in args] if normalize else list(args)
+            if kwargs:
+                # Keyword arguments are part of the request too; sort them so call order doesn't matter
+                key_args.append(sorted(
+                    (name, normalize_query(value) if normalize else value) for name, value in kwargs.items()
+                ))
+            key = make_cache_key(namespace, *key_args)
+            
+            if cache is not None:
+                hit, value = cache.get(key)
+                if hit:
+                    self.logger.debug(f"Request cache hit for {namespace}")
+                    return value
+            
+            def fetch():
+                if cache is not None:
+                    # Another thread may have filled the cache since our lookup
+                    hit, value = cache.get(key)
+                    if hit:
+                        return value
+                
+                value = func(self, *args, **kwargs)
+                if isinstance(value, Uncached):
+                    return value.value
+                if cache is not None:
+                    cache.set(key, value, ttl if value is not None else miss_ttl)
+                return value
+            
+            return _single_flight.do(key, fetch)
+        return wrapper
+    return decorator
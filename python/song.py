@@ -4,12 +4,153 @@
 """
 import os
 import shutil
+import struct
+import tempfile
 from pathlib import Path
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
 import logging
 
 from mutagen.flac import FLAC, Picture
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Linux FICLONE ioctl: share the source's extents copy-on-write (Btrfs, XFS, bcachefs)
+_FICLONE = 0x40049409
+
+# FLAC metadata block types and limits
+_FLAC_STREAMINFO = 0
+_FLAC_PADDING = 1
+_FLAC_VORBIS_COMMENT = 4
+_FLAC_MAX_BLOCK_SIZE = (1 << 24) - 1
+_DEFAULT_PADDING = 1024
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    """Try to clone src to dst without copying any data.
+    
+    Args:
+        src: Source file
+        dst: Destination file (created or truncated)
+        
+    Returns:
+        bool: True if the clone succeeded, False if the filesystem can't do it
+    """
+    if fcntl is None:
+        return False
+    
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except OSError:
+        return False
+
+
+def _temp_path_for(dest_path: Path) -> Path:
+    """Create an empty temporary file next to dest_path.
+    
+    Files are written under this name and moved over dest_path with
+    os.replace once complete, so readers and concurrent writers never see
+    a partly written file.
+    
+    Args:
+        dest_path: Final destination
+        
+    Returns:
+        Path: The temporary file, in the same directory and ending in '.flac'
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=dest_path.parent, prefix=f".{dest_path.stem}.", suffix='.tmp.flac')
+    os.close(fd)
+    return Path(tmp_name)
+
+
+def _read_flac_blocks(fileobj) -> Optional[Tuple[List[Tuple[int, bytes]], int]]:
+    """Read the metadata blocks at the start of a FLAC stream.
+    
+    Args:
+        fileobj: Binary file object positioned at the start of the file
+        
+    Returns:
+        Optional[Tuple[List[Tuple[int, bytes]], int]]: (block type, block data)
+        pairs and the offset where the audio frames start, or None if the
+        file doesn't start with a plain FLAC header (e.g. an ID3v2 prefix)
+    """
+    if fileobj.read(4) != b'fLaC':
+        return None
+    
+    blocks = []
+    while True:
+        header = fileobj.read(4)
+        if len(header) < 4:
+            return None
+        
+        length = int.from_bytes(header[1:4], 'big')
+        data = fileobj.read(length)
+        if len(data) < length:
+            return None
+        
+        blocks.append((header[0] & 0x7F, data))
+        if header[0] & 0x80:
+            return blocks, fileobj.tell()
+
+
+def _build_vorbis_comment(vendor: bytes, tags: Dict[str, Any]) -> Optional[bytes]:
+    """Encode tags as a FLAC Vorbis comment block, the way save_overwrite writes them.
+    
+    Args:
+        vendor: Vendor string to keep
+        tags: Metadata dictionary (keys are uppercased)
+        
+    Returns:
+        Optional[bytes]: Block data, or None if a key isn't a valid field name
+    """
+    comments = []
+    for key, value in tags.items():
+        if value is None or value == "":
+            continue
+        
+        tag_key = key.upper()
+        if not tag_key or '=' in tag_key or not all(0x20 <= ord(c) <= 0x7D for c in tag_key):
+            return None
+        
+        values = value if isinstance(value, list) else [value]
+        for item in values:
+            comments.append(f"{tag_key}={item}".encode('utf-8'))
+    
+    parts = [struct.pack('<I', len(vendor)), vendor, struct.pack('<I', len(comments))]
+    for comment in comments:
+        parts.append(struct.pack('<I', len(comment)))
+        parts.append(comment)
+    return b''.join(parts)
+
+
+def _copy_range(fsrc, fdst, offset: int) -> None:
+    """Copy everything from offset to the end of fsrc onto fdst.
+    
+    Uses os.sendfile so the data never passes through Python where the
+    platform allows it, and falls back to a buffered copy otherwise.
+    
+    Args:
+        fsrc: Source file object
+        fdst: Unbuffered destination file object
+        offset: Offset in the source to start copying from
+    """
+    remaining = os.fstat(fsrc.fileno()).st_size - offset
+    try:
+        while remaining > 0:
+            sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, remaining)
+            if sent == 0:
+                break
+            offset += sent
+            remaining -= sent
+    except (AttributeError, OSError):
+        fsrc.seek(offset)
+        shutil.copyfileobj(fsrc, fdst)
+
 
 class Song:
     """A class representing a FLAC audio file with its metadata.
@@ -29,6 +170,10 @@ class Song:
         self.folderpath = self.filepath.parent
         self.filename = self.filepath.name
         self.logger = logger or logging.getLogger(__name__)
+        # Set by the processor when this run should refresh tags that already exist
+        self.force_update = False
+        # Similarity score (0-1) of a recording ID matched from existing tags during this run, if any
+        self.match_score: Optional[float] = None
         
         # Ensure file exists and is a FLAC file
         if not self.filepath.exists():
@@ -64,8 +209,29 @@ class Song:
             # Also add to base_metadata for preserving existing tags
             self.base_metadata[key.lower()] = value
         
+        # Snapshot of what is on disk, used to tell whether a save is needed
+        self._saved_metadata = dict(self.all_metadata)
         self.logger.debug(f"Loaded {len(self.all_metadata)} metadata tags")
     
+    def is_modified(self) -> bool:
+        """Check whether the tags differ from what was last loaded or saved.
+        
+        Returns:
+            bool: True if all_metadata has changed, False otherwise
+        """
+        return self.all_metadata != self._saved_metadata
+    
+    def is_tag_modified(self, name: str) -> bool:
+        """Check whether one tag differs from what was last loaded or saved.
+        
+        Args:
+            name: Lower-case tag name
+            
+        Returns:
+            bool: True if the tag was added, changed or removed since then
+        """
+        return self.all_metadata.get(name) != self._saved_metadata.get(name)
+    
     def _load_audio(self) -> Optional[FLAC]:
         """Load the FLAC audio file.
         
@@ -119,6 +285,7 @@ class Song:
             
             # Save the file
             audio.save()
+            self._saved_metadata = dict(self.all_metadata)
             self.logger.info(f"Saved metadata (overwrite) to {self.filepath}")
             return True
             
@@ -171,6 +338,133 @@ class Song:
             self.logger.error(f"Error saving metadata to {self.filepath}: {e}")
             return False
     
+    def write_to(self, destination: Union[str, Path]) -> bool:
+        """Write the song with its current metadata to a new location.
+        
+        Equivalent to copy_to followed by save_overwrite on the copy, but the
+        file is only written once: where the filesystem can clone it, the
+        clone's header is rewritten in place; otherwise the new tag block is
+        written first and the audio frames are streamed after it. Either way
+        the file is built under a temporary name and then moved over the
+        destination, so concurrent writers to one path never interleave.
+        
+        Args:
+            destination: Destination path
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        dest_path = Path(destination)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        tmp_path = None
+        try:
+            tmp_path = _temp_path_for(dest_path)
+            written = self._write_file(tmp_path)
+            if written:
+                os.replace(tmp_path, dest_path)
+        except Exception as e:
+            self.logger.error(f"Error writing {self.filepath} to {dest_path}: {e}")
+            written = False
+        finally:
+            if tmp_path:
+                tmp_path.unlink(missing_ok=True)
+        
+        if written:
+            self.logger.info(f"Wrote {self.filepath} with metadata to {dest_path}")
+        return written
+    
+    def _write_file(self, dest_path: Path) -> bool:
+        """Write the song with its current metadata to dest_path, overwriting it.
+        
+        Args:
+            dest_path: Path to write, normally a temporary file
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if _reflink(self.filepath, dest_path):
+            return self._save_copy(dest_path)
+        
+        if self._write_with_tags(dest_path):
+            return True
+        
+        # Unusual layout (e.g. an ID3 header in front); copy and let mutagen handle it
+        shutil.copy2(self.filepath, dest_path)
+        return self._save_copy(dest_path)
+    
+    def _save_copy(self, dest_path: Path) -> bool:
+        """Save this song's metadata over a copy of the file at dest_path.
+        
+        Args:
+            dest_path: Path of the copy
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            new_song = Song(dest_path, self.logger)
+        except Exception as e:
+            self.logger.error(f"Error loading copied file {dest_path}: {e}")
+            return False
+        
+        new_song.all_metadata = self.all_metadata.copy()
+        return new_song.save_overwrite()
+    
+    def _write_with_tags(self, dest_path: Path) -> bool:
+        """Write a new FLAC header carrying all_metadata, then stream the audio after it.
+        
+        Args:
+            dest_path: Destination path
+            
+        Returns:
+            bool: True if written, False if the source layout isn't supported
+            (nothing is written in that case)
+        """
+        with open(self.filepath, 'rb') as fsrc:
+            parsed = _read_flac_blocks(fsrc)
+            if not parsed:
+                return False
+            blocks, audio_offset = parsed
+            if blocks[0][0] != _FLAC_STREAMINFO:
+                return False
+            
+            vendor = b''
+            padding = 0
+            for block_type, data in blocks:
+                if block_type == _FLAC_VORBIS_COMMENT and len(data) >= 4:
+                    vendor_length = struct.unpack('<I', data[:4])[0]
+                    vendor = data[4:4 + vendor_length]
+                elif block_type == _FLAC_PADDING:
+                    padding += len(data)
+            
+            comment = _build_vorbis_comment(vendor, self.all_metadata)
+            if comment is None:
+                return False
+            
+            # Keep every other block as-is, with the new comment right after STREAMINFO
+            new_blocks = [blocks[0], (_FLAC_VORBIS_COMMENT, comment)]
+            new_blocks.extend(
+                block for block in blocks[1:] if block[0] not in (_FLAC_VORBIS_COMMENT, _FLAC_PADDING)
+            )
+            new_blocks.append((_FLAC_PADDING, bytes(padding or _DEFAULT_PADDING)))
+            
+            if any(len(data) > _FLAC_MAX_BLOCK_SIZE for _, data in new_blocks):
+                return False
+            
+            header = [b'fLaC']
+            for index, (block_type, data) in enumerate(new_blocks):
+                last_flag = 0x80 if index == len(new_blocks) - 1 else 0
+                header.append(bytes([block_type | last_flag]) + len(data).to_bytes(3, 'big'))
+                header.append(data)
+            
+            with open(dest_path, 'wb', buffering=0) as fdst:
+                fdst.write(b''.join(header))
+                _copy_range(fsrc, fdst, audio_offset)
+        
+        shutil.copystat(self.filepath, dest_path)
+        return True
+    
     def copy_to(self, destination: Union[str, Path]) -> Optional['Song']:
         """Copy the song file to a new location.
         
@@ -185,9 +479,14 @@ class Song:
         # Create parent directories if they don't exist
         dest_path.parent.mkdir(parents=True, exist_ok=True)
         
+        tmp_path = None
         try:
-            # Copy the file
-            shutil.copy2(self.filepath, dest_path)
+            tmp_path = _temp_path_for(dest_path)
+            # Copy the file, as a copy-on-write clone where the filesystem supports it.
+            # shutil.copy2 already uses in-kernel copies (sendfile/fcopyfile) otherwise.
+            if not _reflink(self.filepath, tmp_path):
+                shutil.copy2(self.filepath, tmp_path)
+            os.replace(tmp_path, dest_path)
             self.logger.info(f"Copied {self.filepath} to {dest_path}")
             
             # Return a new Song object for the copied file
@@ -195,6 +494,9 @@ class Song:
         except Exception as e:
             self.logger.error(f"Error copying {self.filepath} to {dest_path}: {e}")
             return None
+        finally:
+            if tmp_path:
+                tmp_path.unlink(missing_ok=True)
     
     def get_cover_art(self) -> Optional[bytes]:
         """Get cover art data from the FLAC file.